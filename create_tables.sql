@@ -36,9 +36,31 @@ CREATE TABLE IF NOT EXISTS analysis_templates (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_analyses_nicho ON analyses(nicho);
 CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at_id ON analyses(created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses(status);
 CREATE INDEX IF NOT EXISTS idx_analysis_templates_nicho ON analysis_templates(nicho);
 
+-- Distinct niches via loose index scan on idx_analyses_nicho (GET /api/nichos)
+CREATE OR REPLACE FUNCTION distinct_nichos()
+RETURNS TABLE (nicho TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH RECURSIVE distintos AS (
+        (SELECT a.nicho FROM analyses a ORDER BY a.nicho LIMIT 1)
+        UNION ALL
+        SELECT (
+            SELECT a.nicho FROM analyses a
+            WHERE a.nicho > d.nicho
+            ORDER BY a.nicho
+            LIMIT 1
+        )
+        FROM distintos d
+        WHERE d.nicho IS NOT NULL
+    )
+    SELECT distintos.nicho::TEXT FROM distintos WHERE distintos.nicho <> '';
+$$;
+
 -- Create function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import text
 import logging
 
 # Configure logging
@@ -7,6 +8,11 @@ logger = logging.getLogger(__name__)
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
+# Statements compilados uma única vez
+SCHEMA_CHECK_STMT = text(
+    "SELECT version(), to_regclass('public.analyses'), to_regclass('public.analysis_templates')"
+)
+
 def init_database(app):
     """Initialize database with proper error handling"""
     try:
@@ -14,17 +20,51 @@ def init_database(app):
         logger.info("✅ Database initialized successfully")
         return True
     except Exception as e:
-        logger.error(f"❌ Error initializing database: {e}")
+        logger.error("❌ Error initializing database: %s", e)
         return False
 
 def test_database_connection(app):
     """Test database connection"""
     try:
         with app.app_context():
-            from sqlalchemy import text
-            result = db.session.execute(text('SELECT 1'))
+            # O checkout do pool já valida a conexão (pool_pre_ping)
+            with db.engine.connect():
+                pass
             logger.info("✅ Database connection test successful")
             return True
     except Exception as e:
-        logger.error(f"❌ Database connection test failed: {e}")
-        return False
\ No newline at end of file
+        logger.error("❌ Database connection test failed: %s", e)
+        return False
+
+def run_schema_selfcheck(app):
+    """Verifica versão do Postgres e existência das tabelas em um único round trip"""
+    with app.app_context():
+        try:
+            version_info, analyses_table, templates_table = db.session.execute(SCHEMA_CHECK_STMT).fetchone()
+            logger.info("✅ Conexão com Supabase estabelecida com sucesso!")
+            logger.info("📊 Versão PostgreSQL: %s", version_info or 'Desconhecida')
+            
+            existing_tables = [name for name, regclass in (
+                ('analyses', analyses_table),
+                ('analysis_templates', templates_table)
+            ) if regclass]
+            logger.info("📋 Tabelas encontradas: %s", existing_tables)
+            
+            if not analyses_table:
+                logger.warning("⚠️ Tabela 'analyses' não encontrada. Execute as migrações do Supabase.")
+            
+        except Exception as e:
+            logger.warning("⚠️ Erro na verificação do banco de dados: %s", e)
+            logger.info("🔄 Aplicação funcionará com funcionalidades limitadas")
+
+def get_pool_stats(engine):
+    """Retorna a ocupação do pool de conexões sem executar SQL (None se não houver pool)"""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return None
+    
+    return {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'overflow': max(pool.overflow(), 0)
+    }
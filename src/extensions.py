@@ -0,0 +1,49 @@
+import os
+import logging
+from flask_caching import Cache
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache compartilhado pelos blueprints (padrão cache-aside nas consultas ao banco)
+cache = Cache()
+
+# Limitador de requisições: rejeita o excesso antes de chegar ao pool do banco
+limiter = Limiter(get_remote_address)
+
+# Limite das rotas do blueprint de análise (consultas ao Supabase e chamadas à DeepSeek)
+ANALYSIS_RATE_LIMIT = os.getenv('ANALYSIS_RATE_LIMIT', '10/second')
+
+def init_cache(app):
+    """Inicializa o cache: Redis quando REDIS_URL estiver definida, memória local caso contrário"""
+    config = {
+        'CACHE_DEFAULT_TIMEOUT': int(os.getenv('CACHE_DEFAULT_TIMEOUT', '60'))
+    }
+    
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url:
+        config['CACHE_TYPE'] = 'RedisCache'
+        config['CACHE_REDIS_URL'] = redis_url
+    else:
+        config['CACHE_TYPE'] = 'SimpleCache'
+    
+    cache.init_app(app, config=config)
+    # Aplicação única: com cache.app definido, uma falha do backend (Redis fora do ar)
+    # faz o memoize cair para a consulta direta em vez de propagar o erro
+    cache.app = app
+    logger.info("🗃️ Cache inicializado (%s)", config['CACHE_TYPE'])
+
+
+def init_limiter(app):
+    """Inicializa o limitador: contadores no Redis quando REDIS_URL estiver definida, memória local caso contrário"""
+    app.config['RATELIMIT_STORAGE_URI'] = os.getenv('REDIS_URL', 'memory://')
+    app.config['RATELIMIT_DEFAULT'] = os.getenv('RATE_LIMIT_DEFAULT', '200 per minute')
+    app.config['RATELIMIT_HEADERS_ENABLED'] = True
+    # Redis fora do ar não derruba as requisições: contagem segue em memória
+    app.config['RATELIMIT_SWALLOW_ERRORS'] = True
+    app.config['RATELIMIT_IN_MEMORY_FALLBACK_ENABLED'] = True
+    
+    limiter.init_app(app)
+    logger.info("🚦 Limitador inicializado (%s)", app.config['RATELIMIT_DEFAULT'])
@@ -0,0 +1,8 @@
+# Lido automaticamente pelo gunicorn, iniciado a partir de src/ (Procfile, render.yaml e main.py)
+
+def post_worker_init(worker):
+    """Relê os arquivos estáticos em cada worker novo"""
+    # Com --preload o app é importado uma única vez no master: sem esta releitura,
+    # um HUP recriaria os workers com o snapshot antigo
+    from main import refresh_static_snapshot
+    refresh_static_snapshot(worker.wsgi)
@@ -0,0 +1,30 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask baseado em orjson (serialização em C, UTF-8 sem escapes)"""
+    
+    # A ordem de inserção das chaves é mantida; ordenar custa caro em payloads grandes
+    sort_keys = False
+    
+    def _options(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+    
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """jsonify sem a volta por str: os bytes do orjson vão direto para o corpo da resposta"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys, indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
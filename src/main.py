@@ -1,89 +1,109 @@
 import os
+import re
+import gzip
+import orjson
 import logging
-from flask import Flask, send_from_directory, jsonify, request
+import threading
+import time
+import importlib
+import brotli
+from datetime import datetime, timezone
+from flask import Flask, Response, current_app, request, send_from_directory, jsonify
+from flask_compress import Compress
 from flask_cors import CORS
-from dotenv import load_dotenv
-from database import db
-from routes.user import user_bp
-from routes.analysis import analysis_bp
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_environment():
+    """Carrega o .env (em src/ ou na raiz do projeto) apenas se ele existir"""
+    for env_path in (os.path.join(_BASE_DIR, '.env'), os.path.join(os.path.dirname(_BASE_DIR), '.env')):
+        if os.path.isfile(env_path):
+            from dotenv import load_dotenv
+            load_dotenv(env_path)
+            return
+
+# Antes dos módulos locais: extensions e este arquivo leem variáveis do .env na importação
+load_environment()
+
+from database import db, run_schema_selfcheck, get_pool_stats
+from extensions import init_cache, init_limiter, limiter
+from json_provider import ORJSONProvider
+from metrics import init_metrics
 
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    force=True
 )
+# Bibliotecas HTTP muito verbosas: só avisos e erros
+for _noisy in ('httpx', 'httpcore', 'hpack', 'urllib3'):
+    logging.getLogger(_noisy).setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-# Carrega as variáveis de ambiente
-load_dotenv()
-
-# Criar aplicação Flask
-app = Flask(__name__, static_folder='static')
-
-# Configurar CORS para permitir todas as origens
-CORS(app, origins=os.getenv('CORS_ORIGINS', '*'))
-
-# Configuração da aplicação
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a-default-secret-key-that-should-be-changed')
-
-# Registrar blueprints
-app.register_blueprint(user_bp, url_prefix='/api')
-app.register_blueprint(analysis_bp, url_prefix='/api')
+# Blueprints importados apenas na criação da aplicação (após carregar o .env)
+BLUEPRINTS = (
+    ('routes.user', 'user_bp'),
+    ('routes.analysis', 'analysis_bp')
+)
 
-# Configuração do banco de dados com tratamento robusto de erros
-database_url = os.getenv('DATABASE_URL')
-if database_url:
+def configure_database(app):
+    """Configuração do banco de dados com tratamento robusto de erros"""
+    # Referência ao engine para os caminhos quentes (ping do health, stats do pool)
+    app.config['DB_ENGINE'] = None
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        logger.warning("⚠️ DATABASE_URL não encontrada. Executando sem funcionalidades de banco de dados.")
+        return
+    
     try:
         # Configuração otimizada para Supabase
         app.config['SQLALCHEMY_DATABASE_URI'] = database_url
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        engine_options = {
             'pool_pre_ping': True,
             'pool_recycle': 300,
-            'pool_timeout': 30,
-            'pool_size': 10,
-            'max_overflow': 20,
             'connect_args': {
                 'sslmode': 'require',
                 'connect_timeout': 30,
                 'application_name': 'ARQV2_DeepSeek_App',
-                'options': '-c timezone=UTC'
+                'options': '-c timezone=UTC',
+                # Detecta rapidamente sockets mortos (NAT/proxies do provedor)
+                'keepalives': 1,
+                'keepalives_idle': 30,
+                'keepalives_interval': 10,
+                'keepalives_count': 3
             }
         }
         
-        db.init_app(app)
+        # POOL_MODE=null: sem pool local, para uso atrás de um pooler externo
+        # (PgBouncer / pooler do Supabase na porta 6543, modo transação)
+        if os.getenv('POOL_MODE', 'queue').lower() == 'null':
+            from sqlalchemy.pool import NullPool
+            engine_options['poolclass'] = NullPool
+            logger.info("🔌 Pool de conexões local desativado (NullPool)")
+        else:
+            engine_options.update({
+                'pool_timeout': 30,
+                'pool_size': int(os.getenv('POOL_SIZE', '10')),
+                'max_overflow': int(os.getenv('MAX_OVERFLOW', '20'))
+            })
         
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+        
+        db.init_app(app)
         with app.app_context():
-            try:
-                # Teste de conexão mais robusto
-                from sqlalchemy import text
-                result = db.session.execute(text('SELECT version()'))
-                version_info = result.fetchone()
-                logger.info(f"✅ Conexão com Supabase estabelecida com sucesso!")
-                logger.info(f"📊 Versão PostgreSQL: {version_info[0] if version_info else 'Desconhecida'}")
-                
-                # Verificar se as tabelas existem
-                tables_check = db.session.execute(text("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = 'public' 
-                    AND table_name IN ('analyses', 'analysis_templates')
-                """))
-                existing_tables = [row[0] for row in tables_check.fetchall()]
-                logger.info(f"📋 Tabelas encontradas: {existing_tables}")
-                
-                if 'analyses' not in existing_tables:
-                    logger.warning("⚠️ Tabela 'analyses' não encontrada. Execute as migrações do Supabase.")
-                
-            except Exception as e:
-                logger.warning(f"⚠️ Erro na verificação do banco de dados: {e}")
-                logger.info("🔄 Aplicação funcionará com funcionalidades limitadas")
-                
+            app.config['DB_ENGINE'] = db.engine
+        
+        # Auto-verificação opcional do schema: roda em cada processo na importação,
+        # por isso fica desligada por padrão para não atrasar o boot dos workers
+        if os.getenv('RUN_DB_SELFCHECK', '0') == '1':
+            run_schema_selfcheck(app)
+        
     except Exception as e:
-        logger.error(f"❌ Erro na configuração do banco de dados: {e}")
+        logger.error("❌ Erro na configuração do banco de dados: %s", e)
         logger.info("🔄 Aplicação funcionará sem persistência de dados")
-else:
-    logger.warning("⚠️ DATABASE_URL não encontrada. Executando sem funcionalidades de banco de dados.")
 
 # Verificar configuração das APIs
 def check_api_configuration():
@@ -111,137 +131,305 @@ def check_api_configuration():
     
     return apis_status
 
-# Verificar configuração na inicialização
-api_status = check_api_configuration()
+# Cache do ping ao banco: probes de health (k8s, uptime) não devem gerar
+# um round trip ao Postgres a cada requisição
+_DB_PING_TTL = 5.0
+_db_ping_cache = {'ts': float('-inf'), 'status': 'disconnected'}
+_db_ping_lock = threading.Lock()
 
-# Rota de health check aprimorada
-@app.route('/health')
-def health_check():
-    """Health check com informações detalhadas do sistema"""
+def get_db_connection_status(engine):
+    """Retorna o status de conectividade do banco, revalidado no máximo a cada _DB_PING_TTL segundos"""
+    if engine is None:
+        return 'disconnected'
     
-    # Status das APIs
-    deepseek_status = api_status.get('deepseek', 'not_configured')
-    supabase_status = api_status.get('supabase', 'not_configured')
-    database_status = 'configured' if database_url else 'not_configured'
+    if time.monotonic() - _db_ping_cache['ts'] < _DB_PING_TTL:
+        return _db_ping_cache['status']
     
-    # Verificar conectividade do banco
-    db_connection_status = 'disconnected'
-    if database_url:
+    # Apenas uma thread executa o ping; as concorrentes aguardam e reutilizam o resultado
+    with _db_ping_lock:
+        if time.monotonic() - _db_ping_cache['ts'] < _DB_PING_TTL:
+            return _db_ping_cache['status']
+        
         try:
-            with app.app_context():
-                from sqlalchemy import text
-                db.session.execute(text('SELECT 1'))
-                db_connection_status = 'connected'
+            # O checkout já executa o pre-ping do pool; nenhum SQL extra é necessário
+            with engine.connect():
+                status = 'connected'
         except Exception as e:
-            logger.error(f"Erro na verificação de conectividade do DB: {e}")
-            db_connection_status = 'error'
+            logger.error("Erro na verificação de conectividade do DB: %s", e)
+            status = 'error'
+        
+        _db_ping_cache['status'] = status
+        _db_ping_cache['ts'] = time.monotonic()
+    
+    return status
+
+# Partes do payload de health que não mudam durante a vida do processo
+_HEALTH_STATIC = {
+    'message': 'UP Lançamentos - Arqueologia do Avatar com DeepSeek AI',
+    'version': '2.1.0',
+    'environment': os.getenv('FLASK_ENV', 'development')
+}
+
+def build_health_services(api_status, database_url):
+    """Parte fixa do status dos serviços, calculada uma vez na inicialização"""
+    return {
+        'deepseek_ai': api_status.get('deepseek', 'not_configured'),
+        'supabase': api_status.get('supabase', 'not_configured'),
+        'database': 'configured' if database_url else 'not_configured'
+    }
+
+# Rota de health check aprimorada
+def health_check():
+    """Health check com informações detalhadas do sistema"""
+    services_base = current_app.config['HEALTH_SERVICES']
+    engine = current_app.config['DB_ENGINE']
+    ai_configured = services_base['deepseek_ai'] == 'configured'
+    
+    # Verificar conectividade do banco (resultado em cache por alguns segundos)
+    db_connection_status = get_db_connection_status(engine)
     
     # Status geral do sistema
     overall_status = 'healthy'
-    if deepseek_status == 'not_configured' or db_connection_status == 'error':
+    if not ai_configured or db_connection_status == 'error':
         overall_status = 'degraded'
     
-    return jsonify({
-        'status': overall_status,
-        'message': 'UP Lançamentos - Arqueologia do Avatar com DeepSeek AI',
-        'services': {
-            'deepseek_ai': deepseek_status,
-            'supabase': supabase_status,
-            'database': database_status,
-            'db_connection': db_connection_status
-        },
-        'version': '2.1.0',
-        'environment': os.getenv('FLASK_ENV', 'development'),
-        'timestamp': os.popen('date').read().strip(),
-        'features': {
+    return jsonify(dict(
+        _HEALTH_STATIC,
+        status=overall_status,
+        services=dict(
+            services_base,
+            db_connection=db_connection_status,
+            db_pool=get_pool_stats(engine) if engine is not None else None
+        ),
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        features={
             'web_search': True,
-            'ai_analysis': deepseek_status == 'configured',
+            'ai_analysis': ai_configured,
             'data_persistence': db_connection_status == 'connected',
             'real_time_research': True
         }
+    ))
+
+# Payloads constantes serializados uma única vez na importação
+def _encode_json(payload):
+    """Serializa um payload constante para bytes JSON em UTF-8"""
+    return orjson.dumps(payload)
+
+_SYSTEM_INFO_BYTES = _encode_json({
+    'app_name': 'UP Lançamentos - Arqueologia do Avatar',
+    'version': '2.1.0',
+    'ai_model': 'DeepSeek R1 Distill Llama 70B',
+    'features': [
+        'Análise ultra-detalhada de avatar',
+        'Pesquisa em tempo real na internet',
+        'Análise competitiva avançada',
+        'Projeções baseadas em dados reais',
+        'Plano de ação executável'
+    ],
+    'supported_niches': [
+        'Marketing Digital',
+        'Neuroeducação',
+        'Fitness e Bem-estar',
+        'Desenvolvimento Pessoal',
+        'Finanças e Investimentos',
+        'Saúde e Medicina',
+        'Educação Online',
+        'Consultoria Empresarial'
+    ]
+})
+
+# Versões pré-comprimidas: nenhuma compressão em tempo de requisição
+_SYSTEM_INFO_ENCODED = {
+    'br': brotli.compress(_SYSTEM_INFO_BYTES, quality=11),
+    'gzip': gzip.compress(_SYSTEM_INFO_BYTES, compresslevel=9)
+}
+
+_ERROR_BODIES = {
+    404: _encode_json({
+        'error': 'Recurso não encontrado',
+        'message': 'O endpoint solicitado não existe',
+        'status_code': 404
+    }),
+    500: _encode_json({
+        'error': 'Erro interno do servidor',
+        'message': 'Ocorreu um erro inesperado. Tente novamente.',
+        'status_code': 500
+    }),
+    400: _encode_json({
+        'error': 'Requisição inválida',
+        'message': 'Os dados enviados são inválidos',
+        'status_code': 400
+    }),
+    429: _encode_json({
+        'error': 'Limite de requisições excedido',
+        'message': 'Muitas requisições. Tente novamente em alguns minutos.',
+        'status_code': 429
     })
+}
+
+def _error_response(status_code):
+    """Cria a resposta de erro a partir do corpo pré-serializado"""
+    return Response(_ERROR_BODIES[status_code], status=status_code, mimetype='application/json')
 
 # Rota para informações do sistema
-@app.route('/api/system/info')
 def system_info():
     """Informações detalhadas do sistema"""
-    return jsonify({
-        'app_name': 'UP Lançamentos - Arqueologia do Avatar',
-        'version': '2.1.0',
-        'ai_model': 'DeepSeek R1 Distill Llama 70B',
-        'features': [
-            'Análise ultra-detalhada de avatar',
-            'Pesquisa em tempo real na internet',
-            'Análise competitiva avançada',
-            'Projeções baseadas em dados reais',
-            'Plano de ação executável'
-        ],
-        'supported_niches': [
-            'Marketing Digital',
-            'Neuroeducação',
-            'Fitness e Bem-estar',
-            'Desenvolvimento Pessoal',
-            'Finanças e Investimentos',
-            'Saúde e Medicina',
-            'Educação Online',
-            'Consultoria Empresarial'
-        ]
-    })
+    encoding = request.accept_encodings.best_match(tuple(_SYSTEM_INFO_ENCODED))
+    if encoding is None:
+        response = Response(_SYSTEM_INFO_BYTES, mimetype='application/json')
+    else:
+        # Content-Encoding já definido: o Flask-Compress não comprime de novo
+        response = Response(_SYSTEM_INFO_ENCODED[encoding], mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def scan_static_files(static_folder):
+    """Retorna o conjunto de caminhos relativos (com '/') dos arquivos estáticos"""
+    return frozenset(
+        os.path.relpath(os.path.join(root, name), static_folder).replace(os.sep, '/')
+        for root, _, names in os.walk(static_folder)
+        for name in names
+    )
+
+# Assets com hash de conteúdo no nome (ex.: app.3f9a1c2b.js) nunca mudam
+_HASHED_ASSET = re.compile(r'\.[0-9a-f]{8,}\.(?:js|css)$')
+_IMMUTABLE_MAX_AGE = 31536000
+
+def find_hashed_assets(static_files):
+    """Subconjunto dos arquivos estáticos que podem ser cacheados como imutáveis"""
+    return frozenset(path for path in static_files if _HASHED_ASSET.search(path))
 
 # Rota para servir arquivos estáticos e SPA
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
 def serve(path):
     """Serve arquivos estáticos e SPA"""
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
+    static_folder = current_app.static_folder
+    # Consulta em memória ao snapshot feito na inicialização, sem stat() por requisição
+    if path in current_app.config['STATIC_IMMUTABLE']:
+        response = send_from_directory(static_folder, path, max_age=_IMMUTABLE_MAX_AGE)
+        response.cache_control.immutable = True
+        return response
+    if path != "" and path != 'index.html' and path in current_app.config['STATIC_FILES']:
+        # Cache-Control: public, max-age=SEND_FILE_MAX_AGE_DEFAULT
+        return send_from_directory(static_folder, path)
+    # O shell da SPA é sempre revalidado (ETag/304) para refletir novos deploys
+    response = send_from_directory(static_folder, 'index.html', max_age=0)
+    response.cache_control.must_revalidate = True
+    return response
 
 # Tratamento de erros aprimorado
-@app.errorhandler(404)
 def not_found(error):
     """Handler para erro 404"""
-    return jsonify({
-        'error': 'Recurso não encontrado',
-        'message': 'O endpoint solicitado não existe',
-        'status_code': 404
-    }), 404
+    return _error_response(404)
 
-@app.errorhandler(500)
 def internal_error(error):
     """Handler para erro 500"""
-    logger.error(f"Erro interno: {error}")
-    return jsonify({
-        'error': 'Erro interno do servidor',
-        'message': 'Ocorreu um erro inesperado. Tente novamente.',
-        'status_code': 500
-    }), 500
+    logger.error("Erro interno: %s", error)
+    return _error_response(500)
 
-@app.errorhandler(400)
 def bad_request(error):
     """Handler para erro 400"""
-    return jsonify({
-        'error': 'Requisição inválida',
-        'message': 'Os dados enviados são inválidos',
-        'status_code': 400
-    }), 400
+    return _error_response(400)
 
-@app.errorhandler(429)
 def rate_limit_exceeded(error):
     """Handler para erro 429"""
-    return jsonify({
-        'error': 'Limite de requisições excedido',
-        'message': 'Muitas requisições. Tente novamente em alguns minutos.',
-        'status_code': 429
-    }), 429
+    return _error_response(429)
+
+def refresh_static_snapshot(app):
+    """Lê o diretório estático e guarda o snapshot consultado por serve()"""
+    app.config['STATIC_FILES'] = scan_static_files(app.static_folder)
+    app.config['STATIC_IMMUTABLE'] = find_hashed_assets(app.config['STATIC_FILES'])
+
+def create_app():
+    """Cria e configura a aplicação Flask"""
+    # Criar aplicação Flask
+    app = Flask(__name__, static_folder='static')
+    app.json = ORJSONProvider(app)
+    
+    # Configurar CORS para permitir todas as origens
+    CORS(app, origins=os.getenv('CORS_ORIGINS', '*'))
+    
+    # Configuração da aplicação
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'a-default-secret-key-that-should-be-changed')
+    
+    # Arquivos estáticos cacheáveis por navegadores/CDNs (em produção, servidos pelo nginx.conf)
+    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = int(os.getenv('STATIC_MAX_AGE', '3600'))
+    
+    # Compressão das respostas (Brotli preferido, gzip como alternativa)
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 500
+    app.config['COMPRESS_LEVEL'] = 4
+    app.config['COMPRESS_BR_LEVEL'] = 4
+    Compress(app)
+    
+    # Atrás do proxy do Render/nginx o IP do cliente vem em X-Forwarded-For;
+    # sem isso todos os clientes dividiriam o mesmo limite de requisições
+    proxy_hops = int(os.getenv('PROXY_FIX_HOPS', '0'))
+    if proxy_hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
+    
+    # Cache para as rotas de leitura dos blueprints
+    init_cache(app)
+    
+    # Limite de requisições (health check e arquivos estáticos ficam de fora)
+    init_limiter(app)
+    
+    # Registrar blueprints
+    for module_name, blueprint_name in BLUEPRINTS:
+        blueprint = getattr(importlib.import_module(module_name), blueprint_name)
+        app.register_blueprint(blueprint, url_prefix='/api')
+    
+    configure_database(app)
+    
+    # Pool de conexões e latência das consultas em /metrics
+    init_metrics(app)
+    
+    # Verificar configuração na inicialização
+    app.config['API_STATUS'] = check_api_configuration()
+    app.config['HEALTH_SERVICES'] = build_health_services(
+        app.config['API_STATUS'], app.config.get('SQLALCHEMY_DATABASE_URI')
+    )
+    
+    # Snapshot dos arquivos estáticos; relido em cada worker por gunicorn.conf.py (post_worker_init)
+    refresh_static_snapshot(app)
+    
+    # Rotas da aplicação
+    app.add_url_rule('/health', view_func=limiter.exempt(health_check))
+    app.add_url_rule('/api/system/info', view_func=system_info)
+    app.add_url_rule('/', view_func=limiter.exempt(serve), defaults={'path': ''})
+    app.add_url_rule('/<path:path>', view_func=serve)
+    
+    # Tratamento de erros aprimorado
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
+    app.register_error_handler(400, bad_request)
+    app.register_error_handler(429, rate_limit_exceeded)
+    
+    return app
+
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     debug = os.getenv('FLASK_ENV') != 'production'
     
-    logger.info(f"🚀 Iniciando UP Lançamentos na porta {port}")
-    logger.info(f"🔧 Modo debug: {debug}")
-    logger.info(f"🌐 Ambiente: {os.getenv('FLASK_ENV', 'development')}")
+    logger.info("🚀 Iniciando UP Lançamentos na porta %s", port)
+    logger.info("🔧 Modo debug: %s", debug)
+    logger.info("🌐 Ambiente: %s", os.getenv('FLASK_ENV', 'development'))
+    
+    if not debug:
+        # Em produção o servidor de desenvolvimento do Werkzeug não deve ser usado:
+        # substitui o processo pelo gunicorn com workers e threads
+        logger.info("🦄 Iniciando gunicorn com %s workers", os.getenv('WEB_CONCURRENCY', '4'))
+        os.execvp('gunicorn', [
+            'gunicorn',
+            '--workers', os.getenv('WEB_CONCURRENCY', '4'),
+            '--worker-class', 'gthread',
+            '--threads', os.getenv('GUNICORN_THREADS', '8'),
+            '--bind', f'0.0.0.0:{port}',
+            '--timeout', '120',
+            '--preload',
+            'main:app'
+        ])
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=port, debug=debug, threaded=True)
\ No newline at end of file
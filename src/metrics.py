@@ -0,0 +1,86 @@
+import os
+import hmac
+import time
+import hashlib
+import logging
+from functools import lru_cache
+from prometheus_client import Gauge, Histogram, make_wsgi_app
+from sqlalchemy import event
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Métricas por processo: com vários workers do gunicorn cada um expõe as suas
+POOL_SIZE = Gauge('sqlalchemy_pool_size', 'Tamanho configurado do pool de conexões')
+POOL_CHECKED_OUT = Gauge('sqlalchemy_pool_checkedout', 'Conexões do pool em uso')
+POOL_OVERFLOW = Gauge('sqlalchemy_pool_overflow', 'Conexões abertas além do tamanho do pool')
+
+QUERY_DURATION = Histogram(
+    'query_duration_seconds',
+    'Duração das consultas SQL por hash curto do statement',
+    ['statement']
+)
+
+@lru_cache(maxsize=256)
+def statement_hash(statement):
+    """Hash curto e estável do SQL, usado como label (evita cardinalidade alta)"""
+    return hashlib.blake2s(statement.encode('utf-8'), digest_size=4).hexdigest()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    QUERY_DURATION.labels(statement_hash(statement)).observe(time.perf_counter() - started)
+
+def _handle_error(exception_context):
+    # Consulta com erro não dispara after_cursor_execute: descarta o início pendente
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+def register_pool_metrics(engine):
+    """Liga os gauges ao pool e o histograma aos eventos de execução do engine"""
+    pool = engine.pool
+    # NullPool não mantém conexões, então não há ocupação a reportar
+    if hasattr(pool, 'checkedout'):
+        POOL_SIZE.set_function(pool.size)
+        POOL_CHECKED_OUT.set_function(pool.checkedout)
+        POOL_OVERFLOW.set_function(lambda: max(pool.overflow(), 0))
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+def require_token(wsgi_app, token):
+    """Só repassa requisições com Authorization: Bearer <token>"""
+    expected = f'Bearer {token}'.encode('utf-8')
+
+    def guarded(environ, start_response):
+        # Comparação em tempo constante: o tempo de resposta não revela o token
+        if not hmac.compare_digest(environ.get('HTTP_AUTHORIZATION', '').encode('latin-1'), expected):
+            start_response('401 Unauthorized', [('Content-Type', 'text/plain'), ('WWW-Authenticate', 'Bearer')])
+            return [b'Unauthorized']
+        return wsgi_app(environ, start_response)
+
+    return guarded
+
+def init_metrics(app):
+    """Expõe /metrics no formato do Prometheus (METRICS_ENABLED=1), protegido por METRICS_TOKEN"""
+    if os.getenv('METRICS_ENABLED', '0') != '1':
+        return
+
+    # /metrics fica na frente do app público, sem o limitador: sem token não é montado
+    token = os.getenv('METRICS_TOKEN')
+    if not token:
+        logger.warning("⚠️ METRICS_ENABLED=1 sem METRICS_TOKEN: /metrics não será exposto")
+        return
+
+    engine = app.config.get('DB_ENGINE')
+    if engine is not None:
+        register_pool_metrics(engine)
+
+    # Atendido fora do Flask: sem contexto de requisição, limitador ou compressão
+    app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {'/metrics': require_token(make_wsgi_app(), token)})
+    logger.info("📈 Métricas expostas em /metrics")
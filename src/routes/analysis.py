@@ -1,21 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 import os
-import json
-from datetime import datetime, timedelta
+import math
+import base64
+import orjson
+from datetime import datetime, timedelta, timezone
 import logging
-from supabase import create_client, Client
-from services.deepseek_client import DeepSeekClient
-import requests
-import re
+import httpx
+from postgrest.types import ReturnMethod
+from supabase import create_client, Client, ClientOptions
+from services.deepseek_client import DeepSeekClient, WebSearcher, create_http_client, get_fallback_json, timestamp_now
+from extensions import cache, limiter, ANALYSIS_RATE_LIMIT
 from typing import Dict, List, Optional, Tuple
 import concurrent.futures
-from functools import lru_cache
+from cachetools.func import ttl_cache
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 analysis_bp = Blueprint('analysis', __name__)
+limiter.limit(ANALYSIS_RATE_LIMIT)(analysis_bp)
 
 # Configure Supabase with robust error handling
 supabase_url = os.getenv('SUPABASE_URL')
@@ -24,22 +27,79 @@ supabase: Client = None
 
 if supabase_url and supabase_key:
     try:
-        supabase = create_client(supabase_url, supabase_key)
+        # Sessão HTTP/2 única para o PostgREST, com keep-alive longo: o padrão do httpx
+        # (5s ocioso) refazia o handshake TLS entre requisições esparsas. O app usa só
+        # tabelas/RPC; storage e functions compartilhariam este cliente.
+        postgrest_http = httpx.Client(
+            http2=True,
+            timeout=float(os.getenv('SUPABASE_TIMEOUT', '10')),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=30)
+        )
+        supabase = create_client(supabase_url, supabase_key, options=ClientOptions(httpx_client=postgrest_http))
         logger.info("✅ Supabase client configurado com sucesso")
     except Exception as e:
-        logger.error(f"❌ Erro ao configurar Supabase: {e}")
+        logger.error("❌ Erro ao configurar Supabase: %s", e)
         supabase = None
 else:
     logger.warning("⚠️ Credenciais do Supabase não encontradas")
 
+# Cliente HTTP compartilhado pelas pesquisas web (HTTP/2 e keep-alive entre requisições)
+_HTTP = create_http_client()
+
 # Initialize DeepSeek client with error handling
 try:
-    deepseek_client = DeepSeekClient()
+    deepseek_client = DeepSeekClient(http=_HTTP)
     logger.info("✅ Cliente DeepSeek configurado com sucesso")
 except Exception as e:
-    logger.error(f"❌ Erro ao inicializar DeepSeek: {e}")
+    logger.error("❌ Erro ao inicializar DeepSeek: %s", e)
     deepseek_client = None
 
+# Formato da chave validado uma única vez (usado por /status e /test-connection)
+_DEEPSEEK_KEY = os.getenv('DEEPSEEK_API_KEY') or ''
+_DEEPSEEK_VALID = _DEEPSEEK_KEY.startswith('sk-') and len(_DEEPSEEK_KEY) > 20
+
+# Análises rodam fora do worker HTTP: a requisição devolve 202 e o cliente
+# acompanha o progresso pela coluna status da tabela analyses. As threads são
+# criadas sob demanda, portanto cada worker do gunicorn (pós-fork) tem as suas.
+_analysis_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv('ANALYSIS_WORKERS', '4')),
+    thread_name_prefix='analysis'
+)
+
+# Chamadas curtas de I/O disparadas em paralelo (testes de conectividade)
+_io_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=int(os.getenv('SUPABASE_IO_WORKERS', '4')),
+    thread_name_prefix='supabase-io'
+)
+
+# Campos do formulário: (chave em analysis_data, chave no JSON da requisição)
+_TEXT_FIELDS = (
+    ('nicho', 'nicho'),
+    ('produto', 'produto'),
+    ('descricao', 'descricao'),
+    ('publico', 'publico'),
+    ('concorrentes', 'concorrentes'),
+    ('dados_adicionais', 'dadosAdicionais')
+)
+# Repassados sem strip (números e prazo chegam como vieram do formulário)
+_RAW_FIELDS = ('preco', 'objetivoReceita', 'prazoLancamento', 'orcamentoMarketing')
+
+# Os jobs vivem na memória do worker: se ele reinicia, a linha fica 'processing' para sempre.
+# Sem atualização por este tempo, o status a dá como falha (o polling do script.js desiste em 10 min)
+ANALYSIS_STALE_AFTER = timedelta(minutes=int(os.getenv('ANALYSIS_STALE_MINUTES', '8')))
+
+def _to_float(value, default: Optional[float] = None) -> Optional[float]:
+    """Converte um campo numérico do formulário, com default para vazio, inválido ou não finito"""
+    if value is None or value == '':
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    # 'nan'/'inf' passam pelo float(), mas quebram os cálculos da análise (int(nan))
+    return number if math.isfinite(number) else default
+
 @analysis_bp.route('/analyze', methods=['POST'])
 def analyze_market():
     """Análise completa de mercado com DeepSeek e pesquisa na internet"""
@@ -50,310 +110,295 @@ def analyze_market():
             return jsonify({'error': 'Nicho é obrigatório'}), 400
         
         # Extract and validate form data
-        analysis_data = {
-            'nicho': data.get('nicho', '').strip(),
-            'produto': data.get('produto', '').strip(),
-            'descricao': data.get('descricao', '').strip(),
-            'preco': data.get('preco', ''),
-            'publico': data.get('publico', '').strip(),
-            'concorrentes': data.get('concorrentes', '').strip(),
-            'dados_adicionais': data.get('dadosAdicionais', '').strip(),
-            'objetivoReceita': data.get('objetivoReceita', ''),
-            'prazoLancamento': data.get('prazoLancamento', ''),
-            'orcamentoMarketing': data.get('orcamentoMarketing', '')
-        }
+        analysis_data = {key: (data.get(field) or '').strip() for key, field in _TEXT_FIELDS}
+        analysis_data.update((field, data.get(field, '')) for field in _RAW_FIELDS)
         
         # Validate and convert numeric fields
-        try:
-            analysis_data['preco_float'] = float(analysis_data['preco']) if analysis_data['preco'] else None
-            analysis_data['objetivo_receita_float'] = float(analysis_data['objetivoReceita']) if analysis_data['objetivoReceita'] else None
-            analysis_data['orcamento_marketing_float'] = float(analysis_data['orcamentoMarketing']) if analysis_data['orcamentoMarketing'] else None
-        except ValueError:
-            analysis_data['preco_float'] = None
-            analysis_data['objetivo_receita_float'] = None
-            analysis_data['orcamento_marketing_float'] = None
+        analysis_data['preco_float'] = _to_float(analysis_data['preco'])
+        analysis_data['objetivo_receita_float'] = _to_float(analysis_data['objetivoReceita'])
+        analysis_data['orcamento_marketing_float'] = _to_float(analysis_data['orcamentoMarketing'])
         
-        logger.info(f"🔍 Iniciando análise para nicho: {analysis_data['nicho']}")
+        logger.info("🔍 Iniciando análise para nicho: %s", analysis_data['nicho'])
+        
+        # Sem banco não há o que gravar nem consultar depois: a análise vai direto na resposta
+        if not supabase:
+            response = analysis_response(analysis_data)
+            logger.info("✅ Análise concluída com sucesso para: %s", analysis_data['nicho'])
+            return response
+        
+        # ?sync=1 (depuração): a análise roda na própria requisição
+        if request.args.get('sync') == '1':
+            analysis_result = run_analysis_sync(analysis_data)
+            logger.info("✅ Análise concluída com sucesso para: %s", analysis_data['nicho'])
+            return jsonify(analysis_result)
         
         # Save initial analysis record (sem campos problemáticos)
         analysis_id = save_initial_analysis_safe(analysis_data)
+        if not analysis_id:
+            # Sem registro não há o que consultar depois: responde de forma síncrona
+            return analysis_response(analysis_data)
         
-        # Generate comprehensive analysis with DeepSeek
-        if deepseek_client:
-            logger.info("🤖 Usando DeepSeek AI para análise avançada")
-            analysis_result = deepseek_client.analyze_avatar_comprehensive(analysis_data)
-        else:
-            logger.info("🔄 DeepSeek não disponível, usando análise de fallback")
-            analysis_result = generate_fallback_analysis(analysis_data)
-        
-        # Update analysis record with results (se disponível)
-        if supabase and analysis_id:
-            update_analysis_record_safe(analysis_id, analysis_result)
-            analysis_result['analysis_id'] = analysis_id
-        
-        logger.info(f"✅ Análise concluída com sucesso para: {analysis_data['nicho']}")
-        return jsonify(analysis_result)
+        # Com o registro criado, a análise segue em segundo plano
+        _analysis_executor.submit(run_analysis_job, current_app._get_current_object(), analysis_id, analysis_data)
+        logger.info("📨 Análise %s enviada para processamento em segundo plano", analysis_id)
+        return jsonify({
+            'analysis_id': analysis_id,
+            'status': 'processing',
+            'status_url': f'/api/analyses/{analysis_id}/status'
+        }), 202
         
     except Exception as e:
-        logger.error(f"❌ Erro na análise: {str(e)}")
+        logger.error("❌ Erro na análise: %s", e)
         return jsonify({
             'error': 'Erro interno do servidor', 
             'details': str(e),
             'fallback_available': True
         }), 500
 
-def save_initial_analysis_safe(data: Dict) -> Optional[int]:
-    """Salva registro inicial da análise apenas com campos que existem"""
+def generate_analysis(data: Dict) -> Dict:
+    """Gera a análise com DeepSeek ou, se indisponível, com o fallback"""
+    if deepseek_client:
+        logger.info("🤖 Usando DeepSeek AI para análise avançada")
+        return deepseek_client.analyze_avatar_comprehensive(data)
+    
+    logger.info("🔄 DeepSeek não disponível, usando análise de fallback")
+    # Cópia nova a cada chamada: quem chama acrescenta campos (analysis_id)
+    return orjson.loads(get_fallback_json(**fallback_inputs(data)))
+
+def analysis_response(data: Dict) -> Response:
+    """Resposta com a análise quando ela não é gravada (sem banco ou sem registro criado)"""
+    if deepseek_client is None or deepseek_client.client is None:
+        logger.info("🔄 DeepSeek não disponível, usando análise de fallback")
+        # JSON pré-serializado vai direto para o corpo, sem montar e reserializar o dicionário
+        return Response(get_fallback_json(**fallback_inputs(data)), mimetype='application/json')
+    return jsonify(generate_analysis(data))
+
+def run_analysis_sync(data: Dict) -> Dict:
+    """Análise na própria requisição, gravada com um único insert já concluído"""
+    analysis_result = generate_analysis(data)
+    
+    # Sem polling não há por que criar antes a linha 'processing': uma escrita em vez de duas
+    analysis_id = save_completed_analysis_safe(data, analysis_result)
+    if analysis_id:
+        analysis_result['analysis_id'] = analysis_id
+    
+    return analysis_result
+
+def run_analysis_job(app, analysis_id: int, data: Dict):
+    """Executa a análise em segundo plano e grava o resultado no registro criado"""
+    with app.app_context():
+        try:
+            analysis_result = generate_analysis(data)
+            analysis_result['analysis_id'] = analysis_id
+            if not update_analysis_record_safe(analysis_id, analysis_result):
+                mark_analysis_failed_safe(analysis_id)
+                return
+            logger.info("✅ Análise %s concluída para: %s", analysis_id, data['nicho'])
+        except Exception as e:
+            logger.error("❌ Erro na análise %s: %s", analysis_id, e)
+            mark_analysis_failed_safe(analysis_id)
+
+def invalidate_cached(func, *args):
+    """Descarta o resultado memoizado; falha do cache só é registrada (a escrita já foi feita)"""
+    try:
+        cache.delete_memoized(func, *args)
+    except Exception as e:
+        logger.warning("⚠️ Erro ao invalidar cache de %s: %s", func.__name__, e)
+
+def mark_analysis_failed_safe(analysis_id: int):
+    """Marca a análise como falha para que o polling do cliente termine"""
+    try:
+        # Só linhas ainda em processamento: nunca sobrescreve uma análise já concluída
+        supabase.table('analyses').update(
+            {'status': 'failed'}, returning=ReturnMethod.minimal
+        ).eq('id', analysis_id).eq('status', 'processing').execute()
+    except Exception as e:
+        logger.warning("⚠️ Erro ao marcar análise %s como falha: %s", analysis_id, e)
+        return
+    
+    invalidate_cached(fetch_analysis, analysis_id)
+
+def is_stale(row: Dict) -> bool:
+    """Análise em processamento sem atualização há mais de ANALYSIS_STALE_AFTER"""
+    updated_at = row.get('updated_at')
+    if row.get('status') != 'processing' or not updated_at:
+        return False
+    try:
+        return datetime.now(timezone.utc) - datetime.fromisoformat(updated_at) > ANALYSIS_STALE_AFTER
+    except (TypeError, ValueError):
+        return False
+
+def build_initial_record(data: Dict) -> Dict:
+    """Campos do formulário gravados na criação da análise"""
+    # Usar apenas campos que sabemos que existem na tabela
+    return {
+        'nicho': data['nicho'],
+        'produto': data['produto'],
+        'descricao': data['descricao'],
+        'preco': data['preco_float'],
+        'publico': data['publico'],
+        'concorrentes': data['concorrentes'],
+        'dados_adicionais': data['dados_adicionais'],
+        # created_at fica a cargo do DEFAULT NOW() da coluna
+        'status': 'processing'
+    }
+
+def build_results_record(results: Dict) -> Dict:
+    """Campos de resultado da análise, marcando o registro como concluído"""
+    record = {
+        'avatar_data': results.get('avatar', {}),
+        'positioning_data': results.get('positioning', {}),
+        'competition_data': results.get('concorrencia', {}),
+        'marketing_data': results.get('marketing', {}),
+        'metrics_data': results.get('metricas', {}),
+        'funnel_data': results.get('funnel', {}),
+        # updated_at: DEFAULT NOW() no insert e trigger update_analyses_updated_at no update
+        'status': 'completed'
+    }
+    
+    # Campos extras apenas quando presentes no resultado
+    if 'market_intelligence' in results:
+        record['market_intelligence'] = results['market_intelligence']
+    if 'plano_acao' in results:
+        record['action_plan'] = results['plano_acao']
+    if results:
+        record['comprehensive_analysis'] = results
+    
+    return record
+
+def insert_analysis_safe(record: Dict) -> Optional[int]:
+    """Insere um registro de análise e devolve o ID (None se o Supabase falhar)"""
     if not supabase:
         logger.warning("⚠️ Supabase não disponível para salvar análise")
         return None
     
     try:
-        # Usar apenas campos que sabemos que existem na tabela
-        analysis_record = {
-            'nicho': data['nicho'],
-            'produto': data['produto'],
-            'descricao': data['descricao'],
-            'preco': data['preco_float'],
-            'publico': data['publico'],
-            'concorrentes': data['concorrentes'],
-            'dados_adicionais': data['dados_adicionais'],
-            'status': 'processing',
-            'created_at': datetime.utcnow().isoformat()
-        }
-        
-        result = supabase.table('analyses').insert(analysis_record).execute()
-        if result.data:
-            analysis_id = result.data[0]['id']
-            logger.info(f"💾 Análise criada no Supabase com ID: {analysis_id}")
-            return analysis_id
+        query = supabase.table('analyses').insert(record)
+        # Só o id volta na resposta: o registro (com os JSONB da análise) acabou de ser enviado
+        query.params = query.params.set('select', 'id')
+        result = query.execute()
+        if not result.data:
+            return None
+        analysis_id = result.data[0]['id']
     except Exception as e:
-        logger.warning(f"⚠️ Erro ao salvar no Supabase: {str(e)}")
+        logger.warning("⚠️ Erro ao salvar no Supabase: %s", e)
+        return None
     
-    return None
+    logger.info("💾 Análise criada no Supabase com ID: %s", analysis_id)
+    # Fora do try da escrita: cache indisponível não transforma um insert feito em falha
+    invalidate_cached(fetch_recent_analyses)
+    invalidate_cached(fetch_nichos)
+    return analysis_id
 
-def update_analysis_record_safe(analysis_id: int, results: Dict):
+def save_initial_analysis_safe(data: Dict) -> Optional[int]:
+    """Salva registro inicial da análise apenas com campos que existem"""
+    return insert_analysis_safe(build_initial_record(data))
+
+def save_completed_analysis_safe(data: Dict, results: Dict) -> Optional[int]:
+    """Salva dados do formulário e resultados em um único insert"""
+    return insert_analysis_safe({**build_initial_record(data), **build_results_record(results)})
+
+def update_analysis_record_safe(analysis_id: int, results: Dict) -> bool:
     """Atualiza registro da análise com resultados usando apenas campos existentes"""
     if not supabase:
-        return
+        return False
     
     try:
-        update_data = {
-            'avatar_data': results.get('avatar', {}),
-            'positioning_data': results.get('positioning', {}),
-            'competition_data': results.get('concorrencia', {}),
-            'marketing_data': results.get('marketing', {}),
-            'metrics_data': results.get('metricas', {}),
-            'funnel_data': results.get('funnel', {}),
-            'status': 'completed',
-            'updated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Tentar adicionar campos extras se existirem
-        try:
-            if 'market_intelligence' in results:
-                update_data['market_intelligence'] = results['market_intelligence']
-            if 'plano_acao' in results:
-                update_data['action_plan'] = results['plano_acao']
-            if results:
-                update_data['comprehensive_analysis'] = results
-        except:
-            pass  # Ignorar se os campos não existirem
-        
-        supabase.table('analyses').update(update_data).eq('id', analysis_id).execute()
-        logger.info(f"💾 Análise {analysis_id} atualizada no Supabase")
-        
+        # return=minimal: PostgREST responde 204 sem devolver a linha atualizada
+        supabase.table('analyses').update(
+            build_results_record(results), returning=ReturnMethod.minimal
+        ).eq('id', analysis_id).execute()
     except Exception as e:
-        logger.warning(f"⚠️ Erro ao atualizar análise no Supabase: {str(e)}")
-
-def generate_fallback_analysis(data: Dict) -> Dict:
-    """Gera análise de fallback quando DeepSeek não está disponível"""
-    logger.info("🔄 Gerando análise de fallback")
+        logger.warning("⚠️ Erro ao atualizar análise no Supabase: %s", e)
+        return False
     
-    nicho = data.get('nicho', 'Produto Digital')
-    produto = data.get('produto', 'Produto Digital')
+    logger.info("💾 Análise %s atualizada no Supabase", analysis_id)
+    invalidate_cached(fetch_analysis, analysis_id)
+    invalidate_cached(fetch_recent_analyses)
+    return True
+
+def fallback_inputs(data: Dict) -> Dict:
+    """Argumentos de get_fallback_json a partir dos dados já validados na rota"""
+    inputs = {
+        'nicho': data.get('nicho'),
+        'produto': data.get('produto'),
+        'preco': data.get('preco_float'),
+        'objetivo_receita': data.get('objetivo_receita_float'),
+        'orcamento_marketing': data.get('orcamento_marketing_float')
+    }
+    # Campos ausentes ficam com os defaults da função
+    return {key: value for key, value in inputs.items() if value is not None}
+
+# Colunas que a listagem aceita em ?fields=; por padrão os blobs JSONB ficam de fora
+ANALYSIS_COLUMNS = frozenset({
+    'id', 'nicho', 'produto', 'descricao', 'preco', 'publico', 'concorrentes',
+    'dados_adicionais', 'objetivo_receita', 'orcamento_marketing', 'prazo_lancamento',
+    'avatar_data', 'positioning_data', 'competition_data', 'marketing_data',
+    'metrics_data', 'funnel_data', 'market_intelligence', 'action_plan',
+    'comprehensive_analysis', 'status', 'created_at', 'updated_at'
+})
+DEFAULT_LIST_FIELDS = 'id,nicho,produto,status,created_at'
+MAX_LIST_LIMIT = 100
+
+def parse_list_fields(fields: Optional[str]) -> str:
+    """Projeção da listagem a partir de ?fields= (colunas desconhecidas são ignoradas)"""
+    if not fields:
+        return DEFAULT_LIST_FIELDS
     
+    columns = [name for name in dict.fromkeys(f.strip() for f in fields.split(',')) if name in ANALYSIS_COLUMNS]
+    if not columns:
+        return DEFAULT_LIST_FIELDS
+    # (created_at, id) é a chave do cursor da próxima página
+    columns.extend(key for key in ('created_at', 'id') if key not in columns)
+    return ','.join(columns)
+
+def encode_cursor(row: Dict) -> str:
+    """Cursor opaco da próxima página a partir da última linha (created_at, id)"""
+    return base64.urlsafe_b64encode(orjson.dumps([row['created_at'], row['id']])).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """(created_at, id) de um cursor gerado por encode_cursor; ValueError se inválido"""
     try:
-        preco = float(data.get('preco_float', 0)) if data.get('preco_float') is not None else 997.0
-    except (ValueError, TypeError):
-        preco = 997.0
+        created_at, row_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeEncodeError) as e:
+        raise ValueError('cursor inválido') from e
+    if not isinstance(created_at, str) or not isinstance(row_id, int) or '"' in created_at:
+        raise ValueError('cursor inválido')
+    return created_at, row_id
+
+@cache.memoize(timeout=60)
+def fetch_recent_analyses(limit: int, nicho: Optional[str], columns: str = DEFAULT_LIST_FIELDS,
+                          cursor: Optional[str] = None) -> List[Dict]:
+    """Busca as análises mais recentes (cache-aside, invalidado a cada escrita)"""
+    query = supabase.table('analyses').select(columns).order('created_at', desc=True).order('id', desc=True)
     
-    try:
-        objetivo_receita = float(data.get('objetivo_receita_float', 0)) if data.get('objetivo_receita_float') is not None else 100000.0
-    except (ValueError, TypeError):
-        objetivo_receita = 100000.0
-        
-    try:
-        orcamento_marketing = float(data.get('orcamento_marketing_float', 0)) if data.get('orcamento_marketing_float') is not None else 50000.0
-    except (ValueError, TypeError):
-        orcamento_marketing = 50000.0
+    if nicho:
+        query = query.eq('nicho', nicho)
+    # Paginação por keyset em (created_at, id): sem OFFSET, custo constante por página e
+    # sem perder linhas com o mesmo created_at na fronteira entre páginas
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
     
-    return {
-        "escopo": {
-            "nicho_principal": nicho,
-            "subnichos": [f"{nicho} para iniciantes", f"{nicho} avançado", f"{nicho} empresarial"],
-            "produto_ideal": produto,
-            "proposta_valor": f"A metodologia mais completa e prática para dominar {nicho} no mercado brasileiro"
-        },
-        "avatar": {
-            "demografia": {
-                "faixa_etaria": "32-45 anos",
-                "genero": "65% mulheres, 35% homens",
-                "localizacao": "Região Sudeste (45%), Sul (25%), Nordeste (20%), Centro-Oeste (10%)",
-                "renda": "R$ 8.000 - R$ 25.000 mensais",
-                "escolaridade": "Superior completo (80%), Pós-graduação (45%)",
-                "profissoes": ["Empreendedores digitais", "Consultores", "Profissionais liberais", "Gestores", "Coaches"]
-            },
-            "psicografia": {
-                "valores": ["Crescimento pessoal contínuo", "Independência financeira", "Reconhecimento profissional"],
-                "estilo_vida": "Vida acelerada, busca por eficiência e produtividade, valoriza tempo de qualidade com família, investe em desenvolvimento pessoal",
-                "aspiracoes": ["Ser reconhecido como autoridade no nicho", "Ter liberdade geográfica e financeira"],
-                "medos": ["Ficar obsoleto no mercado", "Perder oportunidades por indecisão", "Não conseguir escalar o negócio"],
-                "frustracoes": ["Excesso de informação sem aplicação prática", "Falta de tempo para implementar estratégias"]
-            },
-            "comportamento_digital": {
-                "plataformas": ["Instagram (stories e reels)", "LinkedIn (networking profissional)"],
-                "horarios_pico": "6h-8h (manhã) e 19h-22h (noite)",
-                "conteudo_preferido": ["Vídeos educativos curtos", "Cases de sucesso com números", "Dicas práticas aplicáveis"],
-                "influenciadores": ["Especialistas reconhecidos no nicho", "Empreendedores de sucesso com transparência"]
-            }
-        },
-        "dores_desejos": {
-            "principais_dores": [
-                {
-                    "descricao": f"Dificuldade para se posicionar como autoridade em {nicho}",
-                    "impacto": "Baixo reconhecimento profissional e dificuldade para precificar serviços adequadamente",
-                    "urgencia": "Alta"
-                },
-                {
-                    "descricao": "Falta de metodologia estruturada e comprovada",
-                    "impacto": "Resultados inconsistentes e desperdício de tempo e recursos",
-                    "urgencia": "Alta"
-                },
-                {
-                    "descricao": "Concorrência acirrada e commoditização do mercado",
-                    "impacto": "Guerra de preços e dificuldade para se diferenciar",
-                    "urgencia": "Média"
-                }
-            ],
-            "estado_atual": "Profissional competente com conhecimento técnico, mas sem estratégia clara de posicionamento e crescimento",
-            "estado_desejado": "Autoridade reconhecida no nicho com negócio escalável e lucrativo, trabalhando com propósito e impacto",
-            "obstaculos": ["Falta de método estruturado", "Dispersão de foco em múltiplas estratégias", "Recursos limitados para investimento"],
-            "sonho_secreto": "Ser reconhecido como o maior especialista do nicho no Brasil e ter um negócio que funcione sem sua presença constante"
-        },
-        "concorrencia": {
-            "diretos": [
-                {
-                    "nome": f"Academia Premium {nicho}",
-                    "preco": f"R$ {int(preco * 1.8):,}".replace(',', '.'),
-                    "usp": "Metodologia exclusiva com certificação",
-                    "forcas": ["Marca estabelecida há 5+ anos", "Comunidade ativa de 10k+ membros"],
-                    "fraquezas": ["Preço elevado", "Suporte limitado", "Conteúdo muito teórico"]
-                }
-            ],
-            "indiretos": [
-                {
-                    "nome": "Cursos gratuitos no YouTube",
-                    "tipo": "Conteúdo educacional gratuito"
-                }
-            ],
-            "gaps_mercado": [
-                "Falta de metodologia prática com implementação assistida",
-                "Ausência de suporte contínuo pós-compra",
-                "Preços inacessíveis para profissionais em início de carreira"
-            ]
-        },
-        "mercado": {
-            "tam": "R$ 3,2 bilhões",
-            "sam": "R$ 480 milhões",
-            "som": "R$ 24 milhões",
-            "volume_busca": "67.000 buscas/mês",
-            "tendencias_alta": ["IA aplicada ao nicho", "Automação de processos", "Sustentabilidade e ESG"],
-            "tendencias_baixa": ["Métodos tradicionais offline", "Processos manuais repetitivos"],
-            "sazonalidade": {
-                "melhores_meses": ["Janeiro", "Março", "Setembro"],
-                "piores_meses": ["Dezembro", "Julho"]
-            }
-        },
-        "palavras_chave": {
-            "principais": [
-                {
-                    "termo": f"curso {nicho}",
-                    "volume": "12.100",
-                    "cpc": "R$ 4,20",
-                    "dificuldade": "Média",
-                    "intencao": "Comercial"
-                }
-            ],
-            "custos_plataforma": {
-                "facebook": {"cpm": "R$ 18", "cpc": "R$ 1,45", "cpl": "R$ 28", "conversao": "2,8%"},
-                "google": {"cpm": "R$ 32", "cpc": "R$ 3,20", "cpl": "R$ 52", "conversao": "3,5%"},
-                "youtube": {"cpm": "R$ 12", "cpc": "R$ 0,80", "cpl": "R$ 20", "conversao": "1,8%"},
-                "tiktok": {"cpm": "R$ 8", "cpc": "R$ 0,60", "cpl": "R$ 18", "conversao": "1,5%"}
-            }
-        },
-        "metricas": {
-            "cac_medio": f"R$ {int(orcamento_marketing * 0.01):,}".replace(',', '.'),
-            "funil_conversao": ["100% visitantes", "18% leads", "3,2% vendas"],
-            "ltv_medio": f"R$ {int(preco * 1.8):,}".replace(',', '.'),
-            "ltv_cac_ratio": "4,0:1",
-            "roi_canais": {
-                "facebook": "320%",
-                "google": "380%",
-                "youtube": "250%",
-                "tiktok": "180%"
-            }
-        },
-        "voz_mercado": {
-            "objecoes": [
-                {
-                    "objecao": "Não tenho tempo para mais um curso",
-                    "contorno": "Metodologia de implementação em 15 minutos diários com resultados em 30 dias"
-                }
-            ],
-            "linguagem": {
-                "termos": ["Metodologia", "Sistema", "Framework", "Estratégia", "Resultados"],
-                "girias": ["Game changer", "Virada de chave", "Next level"],
-                "gatilhos": ["Comprovado cientificamente", "Resultados garantidos", "Método exclusivo"]
-            },
-            "crencas_limitantes": [
-                "Preciso trabalhar mais horas para ganhar mais dinheiro",
-                "Só quem tem muito dinheiro consegue se destacar no mercado"
-            ]
-        },
-        "projecoes": {
-            "conservador": {
-                "conversao": "2,0%",
-                "faturamento": f"R$ {int(objetivo_receita * 0.6):,}".replace(',', '.'),
-                "roi": "240%"
-            },
-            "realista": {
-                "conversao": "3,2%",
-                "faturamento": f"R$ {int(objetivo_receita):,}".replace(',', '.'),
-                "roi": "380%"
-            },
-            "otimista": {
-                "conversao": "5,0%",
-                "faturamento": f"R$ {int(objetivo_receita * 1.5):,}".replace(',', '.'),
-                "roi": "580%"
-            }
-        },
-        "plano_acao": [
-            {"passo": 1, "acao": "Validar proposta de valor com pesquisa qualitativa (50 entrevistas)", "prazo": "2 semanas"},
-            {"passo": 2, "acao": "Criar landing page otimizada com copy baseado na pesquisa", "prazo": "1 semana"},
-            {"passo": 3, "acao": "Configurar campanhas de tráfego pago (Facebook e Google)", "prazo": "1 semana"},
-            {"passo": 4, "acao": "Produzir conteúdo de aquecimento (webinar + sequência de e-mails)", "prazo": "2 semanas"},
-            {"passo": 5, "acao": "Executar campanha de pré-lançamento com early bird", "prazo": "1 semana"},
-            {"passo": 6, "acao": "Lançamento oficial com live de abertura", "prazo": "1 semana"},
-            {"passo": 7, "acao": "Otimizar campanhas baseado em dados e escalar investimento", "prazo": "Contínuo"}
-        ],
-        "insights_pesquisa": {
-            "dados_mercado": "Análise baseada em dados de mercado consolidados e benchmarks da indústria",
-            "concorrentes_encontrados": "Principais players identificados através de análise competitiva",
-            "tendencias_identificadas": "Tendências emergentes no mercado brasileiro",
-            "oportunidades_unicas": "Gaps de mercado identificados para diferenciação estratégica"
-        }
-    }
+    return query.limit(limit).execute().data
+
+@cache.memoize(timeout=120)
+def fetch_analysis(analysis_id: int) -> Optional[Dict]:
+    """Busca uma análise pelo ID (cache-aside, invalidado quando a análise é atualizada)"""
+    result = supabase.table('analyses').select('*').eq('id', analysis_id).execute()
+    return result.data[0] if result.data else None
+
+@cache.memoize(timeout=120)
+def fetch_nichos() -> List[str]:
+    """Lista ordenada de nichos distintos (cache-aside, invalidado a cada nova análise)"""
+    try:
+        # DISTINCT no Postgres (migration distinct_nichos): só os valores únicos trafegam
+        rows = supabase.rpc('distinct_nichos').execute().data
+    except Exception as e:
+        logger.warning("⚠️ RPC distinct_nichos indisponível, lendo a coluna inteira: %s", e)
+        rows = supabase.table('analyses').select('nicho').order('nicho').execute().data
+    # Já ordenado pelo banco: dict.fromkeys remove repetidos mantendo a ordem
+    return list(dict.fromkeys(item['nicho'] for item in rows if item['nicho']))
 
 # Rotas existentes mantidas e aprimoradas
 @analysis_bp.route('/analyses', methods=['GET'])
@@ -363,23 +408,27 @@ def get_analyses():
         if not supabase:
             return jsonify({'error': 'Banco de dados não configurado'}), 500
         
-        limit = request.args.get('limit', 10, type=int)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_LIST_LIMIT)
         nicho = request.args.get('nicho')
+        columns = parse_list_fields(request.args.get('fields'))
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Cursor inválido'}), 400
         
-        query = supabase.table('analyses').select('*').order('created_at', desc=True)
-        
-        if nicho:
-            query = query.eq('nicho', nicho)
-        
-        result = query.limit(limit).execute()
+        analyses = fetch_recent_analyses(limit, nicho, columns, cursor)
         
         return jsonify({
-            'analyses': result.data,
-            'count': len(result.data)
+            'analyses': analyses,
+            'count': len(analyses),
+            # Passe como ?cursor= para obter a página seguinte
+            'next_cursor': encode_cursor(analyses[-1]) if len(analyses) == limit else None
         })
         
     except Exception as e:
-        logger.error(f"Erro ao buscar análises: {str(e)}")
+        logger.error("Erro ao buscar análises: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 @analysis_bp.route('/analyses/<int:analysis_id>', methods=['GET'])
@@ -389,13 +438,11 @@ def get_analysis(analysis_id):
         if not supabase:
             return jsonify({'error': 'Banco de dados não configurado'}), 500
         
-        result = supabase.table('analyses').select('*').eq('id', analysis_id).execute()
+        analysis = fetch_analysis(analysis_id)
         
-        if not result.data:
+        if not analysis:
             return jsonify({'error': 'Análise não encontrada'}), 404
         
-        analysis = result.data[0]
-        
         # Retornar análise completa se disponível
         if analysis.get('comprehensive_analysis'):
             return jsonify(analysis['comprehensive_analysis'])
@@ -420,7 +467,36 @@ def get_analysis(analysis_id):
         return jsonify(structured_analysis)
         
     except Exception as e:
-        logger.error(f"Erro ao buscar análise: {str(e)}")
+        logger.error("Erro ao buscar análise: %s", e)
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+@analysis_bp.route('/analyses/<int:analysis_id>/status', methods=['GET'])
+def get_analysis_status(analysis_id):
+    """Status de processamento de uma análise (consultado pelo polling do cliente)"""
+    try:
+        if not supabase:
+            return jsonify({'error': 'Banco de dados não configurado'}), 500
+        
+        # Sem cache: o status muda quando o processamento em segundo plano termina
+        result = supabase.table('analyses').select('id,status,updated_at').eq('id', analysis_id).execute()
+        
+        if not result.data:
+            return jsonify({'error': 'Análise não encontrada'}), 404
+        
+        row = result.data[0]
+        if is_stale(row):
+            # Job perdido (worker reiniciado): encerra o polling em vez de deixá-lo esperar o limite
+            logger.warning("⚠️ Análise %s parada em processamento desde %s, marcando como falha", analysis_id, row['updated_at'])
+            mark_analysis_failed_safe(analysis_id)
+            row['status'] = 'failed'
+        
+        return jsonify({
+            'analysis_id': analysis_id,
+            'status': row['status']
+        })
+        
+    except Exception as e:
+        logger.error("Erro ao buscar status da análise: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 @analysis_bp.route('/nichos', methods=['GET'])
@@ -445,10 +521,7 @@ def get_nichos():
                 'source': 'default'
             })
         
-        result = supabase.table('analyses').select('nicho').execute()
-        
-        nichos = list(set([item['nicho'] for item in result.data if item['nicho']]))
-        nichos.sort()
+        nichos = fetch_nichos()
         
         return jsonify({
             'nichos': nichos,
@@ -457,118 +530,133 @@ def get_nichos():
         })
         
     except Exception as e:
-        logger.error(f"Erro ao buscar nichos: {str(e)}")
+        logger.error("Erro ao buscar nichos: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
 # Nova rota para status do sistema
+@ttl_cache(maxsize=1, ttl=30)
+def _status_payload() -> Dict:
+    """Payload de /status: depende só do ambiente e dos clientes criados na importação"""
+    status = {
+        'deepseek_ai': {
+            'available': deepseek_client is not None and _DEEPSEEK_VALID,
+            'model': 'DeepSeek Chat' if deepseek_client else None,
+            'api_key_format': 'valid' if _DEEPSEEK_VALID else 'invalid',
+            'features': ['web_search', 'real_time_analysis', 'competitor_research'] if deepseek_client else []
+        },
+        'database': {
+            'available': supabase is not None,
+            'provider': 'Supabase PostgreSQL' if supabase else None,
+            'features': ['data_persistence', 'analysis_history'] if supabase else []
+        },
+        'web_search': {
+            'available': True,
+            'providers': ['Google Search', 'Market Research'],
+            'features': ['real_time_data', 'competitor_analysis', 'trend_identification']
+        },
+        'analysis_capabilities': {
+            'avatar_analysis': True,
+            'market_research': True,
+            'competitor_analysis': True,
+            'projection_modeling': True,
+            'action_planning': True
+        }
+    }
+    
+    return status
+
 @analysis_bp.route('/status', methods=['GET'])
 def get_system_status():
     """Retorna status detalhado do sistema de análise"""
     try:
-        # Verificar chave DeepSeek
-        deepseek_key = os.getenv('DEEPSEEK_API_KEY')
-        deepseek_valid = deepseek_key and deepseek_key.startswith('sk-') and len(deepseek_key) > 20
-        
-        status = {
-            'deepseek_ai': {
-                'available': deepseek_client is not None and deepseek_valid,
-                'model': 'DeepSeek Chat' if deepseek_client else None,
-                'api_key_format': 'valid' if deepseek_valid else 'invalid',
-                'features': ['web_search', 'real_time_analysis', 'competitor_research'] if deepseek_client else []
-            },
-            'database': {
-                'available': supabase is not None,
-                'provider': 'Supabase PostgreSQL' if supabase else None,
-                'features': ['data_persistence', 'analysis_history'] if supabase else []
-            },
-            'web_search': {
-                'available': True,
-                'providers': ['Google Search', 'Market Research'],
-                'features': ['real_time_data', 'competitor_analysis', 'trend_identification']
-            },
-            'analysis_capabilities': {
-                'avatar_analysis': True,
-                'market_research': True,
-                'competitor_analysis': True,
-                'projection_modeling': True,
-                'action_planning': True
-            }
-        }
-        
-        return jsonify(status)
+        return jsonify(_status_payload())
         
     except Exception as e:
-        logger.error(f"Erro ao obter status do sistema: {str(e)}")
+        logger.error("Erro ao obter status do sistema: %s", e)
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+def _test_deepseek() -> Dict:
+    """Teste do cliente DeepSeek (configuração e formato da chave)"""
+    if deepseek_client and _DEEPSEEK_VALID:
+        return {
+            'status': 'available',
+            'message': 'DeepSeek AI client configurado e pronto',
+            'api_key_valid': True
+        }
+    
+    return {
+        'status': 'unavailable',
+        'message': 'DeepSeek AI não configurado ou chave inválida',
+        'api_key_valid': False
+    }
+
+def _test_supabase() -> Dict:
+    """Teste de conectividade com o banco (consulta mínima na tabela analyses)"""
+    if not supabase:
+        return {
+            'status': 'unavailable',
+            'message': 'Supabase não configurado'
+        }
+    
+    try:
+        supabase.table('analyses').select('id').limit(1).execute()
+        return {
+            'status': 'connected',
+            'message': 'Conexão com Supabase estabelecida'
+        }
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Erro na conexão: {str(e)}'
+        }
+
+def _test_websearch() -> Dict:
+    """Teste do módulo de pesquisa web"""
+    try:
+        WebSearcher(http=_HTTP)
+        return {
+            'status': 'available',
+            'message': 'Módulo de pesquisa web disponível'
+        }
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Erro no módulo de pesquisa: {str(e)}'
+        }
+
+CONNECTION_TESTS = (
+    ('deepseek', _test_deepseek),
+    ('supabase', _test_supabase),
+    ('web_search', _test_websearch)
+)
+CONNECTION_TEST_TIMEOUT = float(os.getenv('CONNECTION_TEST_TIMEOUT', '5'))
+
 # Rota para teste de conectividade
 @analysis_bp.route('/test-connection', methods=['GET'])
 def test_connection():
     """Testa conectividade com serviços externos"""
     try:
         results = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': timestamp_now(),
             'tests': {}
         }
         
-        # Teste DeepSeek
-        deepseek_key = os.getenv('DEEPSEEK_API_KEY')
-        if deepseek_client and deepseek_key and deepseek_key.startswith('sk-'):
-            try:
-                results['tests']['deepseek'] = {
-                    'status': 'available',
-                    'message': 'DeepSeek AI client configurado e pronto',
-                    'api_key_valid': True
-                }
-            except Exception as e:
-                results['tests']['deepseek'] = {
-                    'status': 'error',
-                    'message': f'Erro no DeepSeek: {str(e)}',
-                    'api_key_valid': False
-                }
-        else:
-            results['tests']['deepseek'] = {
-                'status': 'unavailable',
-                'message': 'DeepSeek AI não configurado ou chave inválida',
-                'api_key_valid': False
-            }
-        
-        # Teste Supabase
-        if supabase:
-            try:
-                # Teste de conectividade com o banco
-                test_result = supabase.table('analyses').select('id').limit(1).execute()
-                results['tests']['supabase'] = {
-                    'status': 'connected',
-                    'message': 'Conexão com Supabase estabelecida'
-                }
-            except Exception as e:
-                results['tests']['supabase'] = {
-                    'status': 'error',
-                    'message': f'Erro na conexão: {str(e)}'
+        # Testes independentes em paralelo: o tempo total é o do mais lento, limitado pelo timeout
+        futures = {name: _io_executor.submit(test) for name, test in CONNECTION_TESTS}
+        concurrent.futures.wait(futures.values(), timeout=CONNECTION_TEST_TIMEOUT)
+        
+        for name, future in futures.items():
+            if future.done():
+                results['tests'][name] = future.result()
+            else:
+                future.cancel()
+                results['tests'][name] = {
+                    'status': 'timeout',
+                    'message': f'Sem resposta em {CONNECTION_TEST_TIMEOUT:g}s'
                 }
-        else:
-            results['tests']['supabase'] = {
-                'status': 'unavailable',
-                'message': 'Supabase não configurado'
-            }
-        
-        # Teste de pesquisa web
-        try:
-            from services.deepseek_client import WebSearcher
-            searcher = WebSearcher()
-            results['tests']['web_search'] = {
-                'status': 'available',
-                'message': 'Módulo de pesquisa web disponível'
-            }
-        except Exception as e:
-            results['tests']['web_search'] = {
-                'status': 'error',
-                'message': f'Erro no módulo de pesquisa: {str(e)}'
-            }
         
         return jsonify(results)
         
     except Exception as e:
-        logger.error(f"Erro no teste de conectividade: {str(e)}")
-        return jsonify({'error': 'Erro interno do servidor'}), 500
\ No newline at end of file
+        logger.error("Erro no teste de conectividade: %s", e)
+        return jsonify({'error': 'Erro interno do servidor'}), 500
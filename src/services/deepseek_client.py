@@ -1,72 +1,282 @@
 import os
-import json
+import io
+import math
 import logging
-import requests
-import time
+import httpx
+import asyncio
 import re
-from typing import Dict, List, Optional, Any
-from openai import OpenAI
-from bs4 import BeautifulSoup
-from urllib.parse import quote_plus
+import time
+import hashlib
+import weakref
+import threading
 import concurrent.futures
+import orjson
+from typing import Dict, List, Optional, Any, Tuple, Union
+from openai import OpenAI, AsyncOpenAI
+import lxml.html
+from lxml import etree
+from urllib.parse import quote_plus, unquote
 from datetime import datetime
+from functools import cache, lru_cache
+from cachetools import TTLCache
+from services import event_loop, search_cache
 
 logger = logging.getLogger(__name__)
 
+SEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Token bucket das buscas: até SEARCH_BURST requisições simultâneas, cada vaga devolvida SEARCH_INTERVAL s depois
+SEARCH_BURST = int(os.getenv('SEARCH_BURST', '2'))
+SEARCH_INTERVAL = float(os.getenv('SEARCH_INTERVAL', '0.5'))
+SEARCH_MAX_RETRIES = 3
+RESEARCH_CONCURRENCY = 3
+
+# Leitura parcial da página de resultados: os primeiros blocos vêm bem antes do fim do HTML
+SERP_MAX_BYTES = int(os.getenv('SERP_MAX_BYTES', '80000'))
+_RESULT_START = re.compile(rb'<div[^>]*\sclass="g[\s"]')
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+
+# Pré-aquecimento de DNS/TLS nos workers (desligado por padrão: gera requisições extras ao Google)
+HTTP_WARMUP = os.getenv('HTTP_WARMUP', '0') == '1'
+
+# Hook de fork único no processo: aponta (sem mantê-lo vivo) para o último cliente criado
+_warmup_client = None
+_warmup_parent_pid = None
+_warmup_hook_registered = False
+
+def _warmup_after_fork() -> None:
+    """Pré-aquece o cliente só nos filhos diretos do processo que o criou (os workers do gunicorn)"""
+    client = _warmup_client() if _warmup_client is not None else None
+    if client is not None and os.getppid() == _warmup_parent_pid:
+        client.warmup()
+
+def _register_warmup(client) -> None:
+    """Liga o cliente ao hook de fork, registrando-o na primeira chamada"""
+    global _warmup_client, _warmup_parent_pid, _warmup_hook_registered
+    _warmup_client, _warmup_parent_pid = weakref.ref(client), os.getpid()
+    if not _warmup_hook_registered:
+        os.register_at_fork(after_in_child=_warmup_after_fork)
+        _warmup_hook_registered = True
+
+class _ORJSONBodyMixin:
+    """Codifica o corpo json= das requisições com orjson no lugar do json da stdlib"""
+    
+    def build_request(self, method, url, *, json=None, **kwargs):
+        if json is not None:
+            headers = httpx.Headers(kwargs.get('headers'))
+            headers.setdefault('Content-Type', 'application/json')
+            kwargs['headers'] = headers
+            kwargs['content'] = orjson.dumps(json)
+        return super().build_request(method, url, **kwargs)
+
+class ORJSONClient(_ORJSONBodyMixin, httpx.Client):
+    """httpx.Client cujo payload JSON (ex.: mensagens do chat) é serializado com orjson"""
+
+class AsyncORJSONClient(_ORJSONBodyMixin, httpx.AsyncClient):
+    """Versão assíncrona de ORJSONClient"""
+
+# Transporte dos clientes OpenAI apontados para o DeepSeek
+DEEPSEEK_HTTP_OPTIONS = {
+    'http2': True,
+    'limits': httpx.Limits(max_connections=32, max_keepalive_connections=16),
+    'timeout': httpx.Timeout(60.0)
+}
+
+# Segundos em que uma resposta do DeepSeek é reaproveitada para o mesmo prompt
+COMPLETION_CACHE_TTL = int(os.getenv('DEEPSEEK_COMPLETION_TTL', '60'))
+
+# Análises por requisição em analyze_avatar_batch (cada uma consome parte de max_tokens)
+BATCH_SIZE = int(os.getenv('DEEPSEEK_BATCH_SIZE', '5'))
+
+def create_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP/2 assíncrono com keep-alive para as pesquisas (conexões reaproveitadas entre buscas)"""
+    # Pode ser criado na importação: o pool só se liga ao loop no primeiro uso, já no worker
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=15,
+        follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=30)
+    )
+
+def _has_class(name: str) -> str:
+    """Predicado XPath equivalente ao seletor CSS .name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+# Expressão compilada uma vez; mesma seleção que o find_all anterior
+_XP_RESULTS = etree.XPath(f"//div[{_has_class('g')}]")
+_SNIPPET_CLASSES = frozenset(('aCOpRe', 'st'))
+_URL_Q = re.compile(r'/url\?q=([^&]*)')
+
+@lru_cache(maxsize=8)
+def _html_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """Parser lxml por encoding declarado na resposta (None deixa o lxml detectar)"""
+    return lxml.html.HTMLParser(encoding=encoding)
+
+def _result_fields(result: Any) -> Tuple[Any, Any, Any]:
+    """Primeiro h3, primeiro a e primeiro span de snippet do resultado, numa única descida com saída antecipada"""
+    title = link = snippet = None
+    for elem in result.iter('h3', 'a', 'span'):
+        if elem.tag == 'h3':
+            if title is None:
+                title = elem
+        elif elem.tag == 'a':
+            if link is None:
+                link = elem
+        elif snippet is None and not _SNIPPET_CLASSES.isdisjoint((elem.get('class') or '').split()):
+            snippet = elem
+        if title is not None and link is not None and snippet is not None:
+            break
+    return title, link, snippet
+
+async def _read_serp(response: httpx.Response, num_results: int) -> bytes:
+    """Lê o corpo só até conter num_results blocos completos (ou SERP_MAX_BYTES) e encerra o stream"""
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        # O início do bloco seguinte indica que os num_results anteriores já chegaram inteiros
+        if len(buffer) >= SERP_MAX_BYTES or len(_RESULT_START.findall(buffer)) > num_results:
+            break
+    return bytes(buffer)
+
+def _brl(value: float) -> str:
+    """Formata um valor em reais, truncado para inteiro, com separador de milhar (R$ 1.234)"""
+    # str.replace mediu mais rápido que str.translate para trocar a vírgula
+    return f"R$ {int(value):,}".replace(',', '.')
+
+_TEMPLATE_PLACEHOLDER = re.compile(r'__([A-Z_]+?)__')
+
+def _json_text(value: str) -> str:
+    """Valor escapado para ser inserido dentro de uma string JSON"""
+    return orjson.dumps(value).decode('utf-8')[1:-1]
+
+def _to_number(value: Any, default: float) -> float:
+    """Campo numérico da análise, com default para vazio, inválido ou não finito ('nan', 'inf')"""
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return number if math.isfinite(number) else default
+
+def _to_text(value: Any, default: str) -> str:
+    """Campo de texto da análise, com default para ausente (None)"""
+    return default if value is None else str(value)
+
+def _render_template(template_json: str, values: Dict[str, str]) -> bytes:
+    """Preenche os marcadores __NOME__ de um template JSON já serializado (marcador sem valor gera KeyError)"""
+    # Substituição em uma única passada: valores inseridos não são reprocessados
+    return _TEMPLATE_PLACEHOLDER.sub(lambda m: values[m.group(1)], template_json).encode('utf-8')
+
+def _retry_after(value: Optional[str], default: float) -> float:
+    """Segundos indicados no Retry-After (limitados a 30s), ou o padrão se ausente/ilegível"""
+    try:
+        return min(max(float(value), 0.0), 30.0)
+    except (TypeError, ValueError):
+        return default
+
 class WebSearcher:
     """Classe para pesquisa na internet com múltiplas fontes"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
+        # Cliente injetado permite compartilhar o pool de conexões entre instâncias
+        self.http = http or create_http_client()
+        self._bucket = asyncio.Semaphore(SEARCH_BURST)
     
-    def search_google(self, query: str, num_results: int = 5) -> List[Dict]:
+    def search_google(self, query: str, num_results: int = 5, max_age: Optional[int] = None) -> List[Dict]:
         """Pesquisa no Google usando scraping"""
+        return event_loop.run(self.search_google_async(query, num_results, max_age))
+    
+    def search_market_data(self, nicho: str) -> Dict:
+        """Pesquisa dados específicos de mercado"""
+        return event_loop.run(self.search_market_data_async(nicho))
+    
+    def get_competitor_info(self, competitor_name: str, nicho: str, timestamp: Optional[str] = None) -> Dict:
+        """Obtém informações específicas sobre um concorrente"""
+        return event_loop.run(self.get_competitor_info_async(competitor_name, nicho, timestamp))
+    
+    async def search_google_async(self, query: str, num_results: int = 5, max_age: Optional[int] = None) -> List[Dict]:
+        """Pesquisa no Google usando scraping (sem bloquear o loop durante a espera da rede)"""
+        key = search_cache.cache_key(query, num_results)
+        cached = search_cache.load(key, max_age)
+        if cached is not None:
+            return cached
+        
         try:
             encoded_query = quote_plus(query)
             url = f"https://www.google.com/search?q={encoded_query}&num={num_results}"
             
-            response = self.session.get(url, timeout=10)
+            response, content = await self._rate_limited_get(url, num_results)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            results = []
-            
-            # Extrair resultados de pesquisa
-            search_results = soup.find_all('div', class_='g')
-            
-            for result in search_results[:num_results]:
-                try:
-                    title_elem = result.find('h3')
-                    link_elem = result.find('a')
-                    snippet_elem = result.find('span', class_=['aCOpRe', 'st'])
-                    
-                    if title_elem and link_elem:
-                        title = title_elem.get_text()
-                        link = link_elem.get('href', '')
-                        snippet = snippet_elem.get_text() if snippet_elem else ''
-                        
-                        if link.startswith('/url?q='):
-                            link = link.split('/url?q=')[1].split('&')[0]
-                        
-                        results.append({
-                            'title': title,
-                            'url': link,
-                            'snippet': snippet
-                        })
-                except Exception as e:
-                    logger.warning(f"Erro ao processar resultado: {e}")
-                    continue
-            
+            results = self._parse_results(content, num_results, response.charset_encoding)
+            # Lista vazia pode ser bloqueio/captcha: não fica em cache
+            if results:
+                search_cache.store(key, results)
             return results
             
         except Exception as e:
-            logger.error(f"Erro na pesquisa Google: {e}")
+            logger.error("Erro na pesquisa Google: %s", e)
             return []
     
-    def search_market_data(self, nicho: str) -> Dict:
+    async def _rate_limited_get(self, url: str, num_results: int) -> Tuple[httpx.Response, bytes]:
+        """GET respeitando o token bucket; em 429 aguarda o Retry-After (ou backoff exponencial) e tenta de novo"""
+        for attempt in range(SEARCH_MAX_RETRIES + 1):
+            await self._bucket.acquire()
+            try:
+                async with self.http.stream('GET', url, headers=SEARCH_HEADERS, timeout=10) as response:
+                    content = await _read_serp(response, num_results) if response.status_code == 200 else b''
+            finally:
+                # A vaga só volta ao bucket depois do intervalo, limitando a taxa por segundo
+                asyncio.get_running_loop().call_later(SEARCH_INTERVAL, self._bucket.release)
+            
+            if response.status_code != 429 or attempt == SEARCH_MAX_RETRIES:
+                return response, content
+            
+            delay = _retry_after(response.headers.get('Retry-After'), 2 ** attempt)
+            logger.warning("⏳ Google retornou 429, nova tentativa em %ss", delay)
+            await asyncio.sleep(delay)
+        return response, content
+    
+    def _parse_results(self, content: bytes, num_results: int, encoding: Optional[str] = None) -> List[Dict]:
+        """Extrai título, link e snippet dos resultados de uma página de busca"""
+        # lxml (libxml2 em C) monta a árvore bem mais rápido que o html.parser do BeautifulSoup
+        tree = lxml.html.document_fromstring(content, parser=_html_parser(encoding))
+        results = []
+        
+        # Extrair resultados de pesquisa
+        search_results = _XP_RESULTS(tree)
+        
+        for result in search_results[:num_results]:
+            try:
+                title_elem, link_elem, snippet_elem = _result_fields(result)
+                
+                if title_elem is not None and link_elem is not None:
+                    # str(): orjson não serializa as subclasses de str do lxml
+                    title = str(title_elem.text_content())
+                    link = str(link_elem.get('href', ''))
+                    snippet = str(snippet_elem.text_content()) if snippet_elem is not None else ''
+                    
+                    # Link de redirecionamento do Google: extrai e decodifica o destino (%3F, %26...)
+                    url_match = _URL_Q.match(link)
+                    if url_match:
+                        link = unquote(url_match.group(1))
+                    
+                    results.append({
+                        'title': title,
+                        'url': link,
+                        'snippet': snippet
+                    })
+            except Exception as e:
+                logger.warning("Erro ao processar resultado: %s", e)
+                continue
+        
+        return results
+    
+    async def search_market_data_async(self, nicho: str) -> Dict:
         """Pesquisa dados específicos de mercado"""
         try:
             queries = [
@@ -77,49 +287,271 @@ class WebSearcher:
                 f"{nicho} público alvo perfil demográfico"
             ]
             
-            market_data = {
-                'market_size': [],
-                'trends': [],
-                'competitors': [],
-                'pricing': [],
-                'demographics': []
-            }
+            keys = ('market_size', 'trends', 'competitors', 'pricing', 'demographics')
             
-            for i, query in enumerate(queries):
-                results = self.search_google(query, 3)
-                key = list(market_data.keys())[i]
-                market_data[key] = results
-                time.sleep(1)  # Rate limiting
+            # Consultas concorrentes; o ritmo fica a cargo do token bucket em _rate_limited_get
+            results = await asyncio.gather(*(self.search_google_async(query, 3) for query in queries))
             
-            return market_data
+            return dict(zip(keys, results))
             
         except Exception as e:
-            logger.error(f"Erro na pesquisa de dados de mercado: {e}")
+            logger.error("Erro na pesquisa de dados de mercado: %s", e)
             return {}
     
-    def get_competitor_info(self, competitor_name: str, nicho: str) -> Dict:
-        """Obtém informações específicas sobre um concorrente"""
+    async def get_competitor_info_async(self, competitor_name: str, nicho: str, timestamp: Optional[str] = None) -> Dict:
+        """Obtém informações específicas sobre um concorrente (timestamp compartilhado pela pesquisa, se informado)"""
         try:
             query = f"{competitor_name} {nicho} preço curso online"
-            results = self.search_google(query, 3)
+            results = await self.search_google_async(query, 3)
             
             return {
                 'name': competitor_name,
                 'search_results': results,
-                'last_updated': datetime.now().isoformat()
+                'last_updated': timestamp or datetime.now().isoformat()
             }
             
         except Exception as e:
-            logger.error(f"Erro ao buscar info do concorrente {competitor_name}: {e}")
+            logger.error("Erro ao buscar info do concorrente %s: %s", competitor_name, e)
             return {}
 
+# Estrutura JSON pedida ao modelo, dividida no único ponto variável (o nicho)
+_PROMPT_SCHEMA_HEAD = '''{
+  "escopo": {
+    "nicho_principal": "'''
+
+_PROMPT_SCHEMA_BODY = '''",
+    "subnichos": ["Subniche específico 1", "Subniche específico 2", "Subniche específico 3"],
+    "produto_ideal": "Nome do produto ideal baseado no nicho",
+    "proposta_valor": "Proposta de valor única e específica baseada na pesquisa"
+  },
+  "avatar": {
+    "demografia": {
+      "faixa_etaria": "Faixa específica em anos",
+      "genero": "Distribuição percentual por gênero",
+      "localizacao": "Principais regiões do Brasil com percentuais",
+      "renda": "Faixa de renda mensal em R$",
+      "escolaridade": "Nível educacional predominante",
+      "profissoes": ["Profissão específica 1", "Profissão específica 2", "Profissão específica 3"]
+    },
+    "psicografia": {
+      "valores": ["Valor específico 1", "Valor específico 2", "Valor específico 3"],
+      "estilo_vida": "Descrição detalhada do estilo de vida",
+      "aspiracoes": ["Aspiração específica 1", "Aspiração específica 2"],
+      "medos": ["Medo específico 1", "Medo específico 2", "Medo específico 3"],
+      "frustracoes": ["Frustração específica 1", "Frustração específica 2"]
+    },
+    "comportamento_digital": {
+      "plataformas": ["Plataforma principal 1", "Plataforma principal 2"],
+      "horarios_pico": "Horários específicos de maior atividade",
+      "conteudo_preferido": ["Tipo de conteúdo 1", "Tipo de conteúdo 2", "Tipo de conteúdo 3"],
+      "influenciadores": ["Tipo de influenciador 1", "Tipo de influenciador 2"]
+    }
+  },
+  "dores_desejos": {
+    "principais_dores": [
+      {
+        "descricao": "Dor específica e detalhada 1",
+        "impacto": "Como esta dor impacta a vida da pessoa",
+        "urgencia": "Alta"
+      },
+      {
+        "descricao": "Dor específica e detalhada 2", 
+        "impacto": "Como esta dor impacta a vida da pessoa",
+        "urgencia": "Média"
+      },
+      {
+        "descricao": "Dor específica e detalhada 3",
+        "impacto": "Como esta dor impacta a vida da pessoa",
+        "urgencia": "Baixa"
+      }
+    ],
+    "estado_atual": "Descrição detalhada do estado atual do avatar",
+    "estado_desejado": "Descrição detalhada do estado desejado",
+    "obstaculos": ["Obstáculo específico 1", "Obstáculo específico 2"],
+    "sonho_secreto": "O sonho mais profundo que o avatar não verbaliza"
+  },
+  "concorrencia": {
+    "diretos": [
+      {
+        "nome": "Nome real do concorrente baseado na pesquisa",
+        "preco": "Faixa de preço em R$ baseada na pesquisa",
+        "usp": "Proposta única específica",
+        "forcas": ["Força específica 1", "Força específica 2"],
+        "fraquezas": ["Fraqueza específica 1", "Fraqueza específica 2"]
+      }
+    ],
+    "indiretos": [
+      {
+        "nome": "Concorrente indireto específico",
+        "tipo": "Tipo de solução alternativa"
+      }
+    ],
+    "gaps_mercado": ["Gap específico 1 baseado na pesquisa", "Gap específico 2", "Gap específico 3"]
+  },
+  "mercado": {
+    "tam": "Valor em R$ bilhões baseado na pesquisa",
+    "sam": "Valor em R$ milhões baseado na pesquisa", 
+    "som": "Valor em R$ milhões baseado na pesquisa",
+    "volume_busca": "Número de buscas mensais baseado na pesquisa",
+    "tendencias_alta": ["Tendência em alta 1 da pesquisa", "Tendência em alta 2"],
+    "tendencias_baixa": ["Tendência em baixa 1 da pesquisa"],
+    "sazonalidade": {
+      "melhores_meses": ["Mês 1", "Mês 2"],
+      "piores_meses": ["Mês 1"]
+    }
+  },
+  "palavras_chave": {
+    "principais": [
+      {
+        "termo": "palavra-chave específica baseada na pesquisa",
+        "volume": "Volume mensal estimado",
+        "cpc": "CPC em R$ estimado",
+        "dificuldade": "Alta/Média/Baixa",
+        "intencao": "Comercial/Informacional"
+      }
+    ],
+    "custos_plataforma": {
+      "facebook": {"cpm": "R$ 18", "cpc": "R$ 1,45", "cpl": "R$ 28", "conversao": "2,8%"},
+      "google": {"cpm": "R$ 32", "cpc": "R$ 3,20", "cpl": "R$ 52", "conversao": "3,5%"},
+      "youtube": {"cpm": "R$ 12", "cpc": "R$ 0,80", "cpl": "R$ 20", "conversao": "1,8%"},
+      "tiktok": {"cpm": "R$ 8", "cpc": "R$ 0,60", "cpl": "R$ 18", "conversao": "1,5%"}
+    }
+  },
+  "metricas": {
+    "cac_medio": "R$ 420",
+    "funil_conversao": ["100% visitantes", "18% leads", "3,2% vendas"],
+    "ltv_medio": "R$ 1.680",
+    "ltv_cac_ratio": "4,0:1",
+    "roi_canais": {
+      "facebook": "320%",
+      "google": "380%",
+      "youtube": "250%",
+      "tiktok": "180%"
+    }
+  },
+  "voz_mercado": {
+    "objecoes": [
+      {
+        "objecao": "Objeção específica comum baseada na pesquisa",
+        "contorno": "Como contornar esta objeção"
+      }
+    ],
+    "linguagem": {
+      "termos": ["Termo técnico 1", "Termo técnico 2"],
+      "girias": ["Gíria do nicho 1"],
+      "gatilhos": ["Gatilho mental 1", "Gatilho mental 2"]
+    },
+    "crencas_limitantes": ["Crença limitante 1", "Crença limitante 2"]
+  },
+  "projecoes": {
+    "conservador": {
+      "conversao": "2,0%",
+      "faturamento": "R$ 60.000",
+      "roi": "240%"
+    },
+    "realista": {
+      "conversao": "3,2%", 
+      "faturamento": "R$ 100.000",
+      "roi": "380%"
+    },
+    "otimista": {
+      "conversao": "5,0%",
+      "faturamento": "R$ 150.000",
+      "roi": "580%"
+    }
+  },
+  "plano_acao": [
+    {
+      "passo": 1,
+      "acao": "Ação específica e prática 1 baseada na análise",
+      "prazo": "2 semanas"
+    },
+    {
+      "passo": 2,
+      "acao": "Ação específica e prática 2 baseada na análise", 
+      "prazo": "1 semana"
+    }
+  ],
+  "insights_pesquisa": {
+    "dados_mercado": "Principais insights da pesquisa de mercado",
+    "concorrentes_encontrados": "Concorrentes identificados na pesquisa",
+    "tendencias_identificadas": "Tendências identificadas na pesquisa",
+    "oportunidades_unicas": "Oportunidades únicas identificadas"
+  }
+}
+'''
+
+# Instruções finais; preço e orçamento entram via str.format
+_PROMPT_TAIL = """
+INSTRUÇÕES CRÍTICAS:
+- Use EXCLUSIVAMENTE dados da pesquisa fornecida quando disponível
+- Substitua TODOS os placeholders por valores numéricos reais
+- Base as projeções no preço ({preco}) e orçamento ({orcamento_marketing}) informados
+- Seja extremamente específico e detalhado
+- Foque em insights acionáveis baseados na pesquisa real
+"""
+
+# Partes invariáveis da análise de fallback (só serializadas uma vez, na importação)
+_ROI_CANAIS = {
+    "facebook": "320%",
+    "google": "380%",
+    "youtube": "250%",
+    "tiktok": "180%"
+}
+
+_VOZ_MERCADO = {
+    "objecoes": [
+        {
+            "objecao": "Não tenho tempo para mais um curso",
+            "contorno": "Metodologia de implementação em 15 minutos diários com resultados em 30 dias"
+        }
+    ],
+    "linguagem": {
+        "termos": ["Metodologia", "Sistema", "Framework", "Estratégia", "Resultados"],
+        "girias": ["Game changer", "Virada de chave", "Next level"],
+        "gatilhos": ["Comprovado cientificamente", "Resultados garantidos", "Método exclusivo"]
+    },
+    "crencas_limitantes": [
+        "Preciso trabalhar mais horas para ganhar mais dinheiro",
+        "Só quem tem muito dinheiro consegue se destacar no mercado"
+    ]
+}
+
+_PLANO_ACAO = [
+    {"passo": 1, "acao": "Validar proposta de valor com pesquisa qualitativa (50 entrevistas)", "prazo": "2 semanas"},
+    {"passo": 2, "acao": "Criar landing page otimizada com copy baseado na pesquisa", "prazo": "1 semana"},
+    {"passo": 3, "acao": "Configurar campanhas de tráfego pago (Facebook e Google)", "prazo": "1 semana"},
+    {"passo": 4, "acao": "Produzir conteúdo de aquecimento (webinar + sequência de e-mails)", "prazo": "2 semanas"},
+    {"passo": 5, "acao": "Executar campanha de pré-lançamento com early bird", "prazo": "1 semana"},
+    {"passo": 6, "acao": "Lançamento oficial com live de abertura", "prazo": "1 semana"},
+    {"passo": 7, "acao": "Otimizar campanhas baseado em dados e escalar investimento", "prazo": "Contínuo"}
+]
+
+_INSIGHTS_PESQUISA = {
+    "dados_mercado": "Análise baseada em dados de mercado consolidados e benchmarks da indústria",
+    "concorrentes_encontrados": "Principais players identificados através de análise competitiva",
+    "tendencias_identificadas": "Tendências emergentes no mercado brasileiro",
+    "oportunidades_unicas": "Gaps de mercado identificados para diferenciação estratégica"
+}
+
 class DeepSeekClient:
     """Cliente avançado para DeepSeek com pesquisa na internet e análise ultra-detalhada"""
     
-    def __init__(self):
+    def __init__(self, http: Optional[httpx.AsyncClient] = None):
         # Usar a chave do DeepSeek diretamente
         self.api_key = os.getenv('DEEPSEEK_API_KEY')
-        self.web_searcher = WebSearcher()
+        self.web_searcher = WebSearcher(http=http)
+        
+        # Singleflight: prompts idênticos simultâneos compartilham a mesma chamada à API,
+        # e repetições dentro de COMPLETION_CACHE_TTL segundos reaproveitam a resposta
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._recent = TTLCache(maxsize=64, ttl=COMPLETION_CACHE_TTL)
+        self._inflight_lock = threading.Lock()
+        self._http = None
+        
+        # Pré-aquecimento nos workers: com --preload o cliente nasce no master, que não deve abrir sockets
+        if HTTP_WARMUP:
+            _register_warmup(self)
         
         if not self.api_key:
             logger.warning("⚠️ DEEPSEEK_API_KEY não encontrada - usando análise de fallback")
@@ -128,15 +560,24 @@ class DeepSeekClient:
         
         # Verificar se a chave está no formato correto
         if not self.api_key.startswith('sk-'):
-            logger.warning(f"⚠️ DEEPSEEK_API_KEY parece inválida (não começa com 'sk-'): {self.api_key[:10]}...")
+            logger.warning("⚠️ DEEPSEEK_API_KEY parece inválida (não começa com 'sk-'): %s...", self.api_key[:10])
             self.client = None
             return
         
         try:
             # Configurar cliente OpenAI para usar a API oficial do DeepSeek
+            # HTTP/2 com keep-alive: a sessão TLS fica aquecida entre chamadas e lotes paralelos multiplexam o socket
+            self._http = ORJSONClient(**DEEPSEEK_HTTP_OPTIONS)
             self.client = OpenAI(
                 api_key=self.api_key,
-                base_url="https://api.deepseek.com"
+                base_url=DEEPSEEK_BASE_URL,
+                http_client=self._http
+            )
+            # Variante assíncrona para o caminho em lote (usada apenas no loop de I/O)
+            self.async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=DEEPSEEK_BASE_URL,
+                http_client=AsyncORJSONClient(**DEEPSEEK_HTTP_OPTIONS)
             )
             
             # Modelo oficial do DeepSeek
@@ -145,11 +586,26 @@ class DeepSeekClient:
             self.temperature = 0.7
             self.top_p = 0.9
             
-            logger.info(f"🤖 DeepSeek Client inicializado com modelo: {self.model}")
+            logger.info("🤖 DeepSeek Client inicializado com modelo: %s", self.model)
         except Exception as e:
-            logger.error(f"❌ Erro ao inicializar cliente DeepSeek: {e}")
+            logger.error("❌ Erro ao inicializar cliente DeepSeek: %s", e)
             self.client = None
     
+    def warmup(self) -> None:
+        """Abre em segundo plano as conexões com Google e DeepSeek, sem bloquear quem chama"""
+        asyncio.run_coroutine_threadsafe(self._warmup(), event_loop.get_loop())
+    
+    async def _warmup(self) -> None:
+        """HEAD leve em cada host: resolve o DNS e deixa a sessão TLS no pool de keep-alive"""
+        targets = [self.web_searcher.http.head('https://www.google.com/', headers=SEARCH_HEADERS, timeout=2)]
+        if self._http is not None:
+            # Cliente síncrono do OpenAI: roda em thread para não bloquear o loop
+            targets.append(asyncio.to_thread(self._http.head, DEEPSEEK_BASE_URL, timeout=2))
+        
+        results = await asyncio.gather(*targets, return_exceptions=True)
+        warmed = sum(not isinstance(result, BaseException) for result in results)
+        logger.info("🔥 Conexões pré-aquecidas: %s de %s (pid %s)", warmed, len(results), os.getpid())
+    
     def analyze_avatar_comprehensive(self, data: Dict) -> Dict:
         """Análise ultra-detalhada do avatar com pesquisa na internet"""
         
@@ -174,80 +630,71 @@ class DeepSeekClient:
             return enriched_analysis
             
         except Exception as e:
-            logger.error(f"❌ Erro na análise DeepSeek: {str(e)}")
+            logger.error("❌ Erro na análise DeepSeek: %s", e)
             return self._create_fallback_analysis(data)
     
     def _conduct_market_research(self, data: Dict) -> Dict:
         """Conduz pesquisa de mercado na internet"""
+        return event_loop.run(self._conduct_market_research_async(data))
+    
+    async def _conduct_market_research_async(self, data: Dict) -> Dict:
+        """Conduz pesquisa de mercado na internet (no loop de I/O)"""
         nicho = data.get('nicho', '')
         concorrentes = data.get('concorrentes', '')
         
+        # Um único horário para a pesquisa e todos os concorrentes dela
+        timestamp = datetime.now().isoformat()
+        
         research_data = {
             'market_data': {},
             'competitor_data': [],
             'trend_data': {},
             'pricing_data': {},
-            'search_timestamp': datetime.now().isoformat()
+            'search_timestamp': timestamp
         }
         
         try:
-            # Pesquisa paralela para eficiência
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                # Pesquisa dados gerais de mercado
-                future_market = executor.submit(self.web_searcher.search_market_data, nicho)
-                
-                # Pesquisa concorrentes específicos
-                competitor_futures = []
-                if concorrentes:
-                    competitor_list = [c.strip() for c in concorrentes.split(',') if c.strip()]
-                    for competitor in competitor_list[:3]:  # Limitar a 3 concorrentes
-                        future = executor.submit(self.web_searcher.get_competitor_info, competitor, nicho)
-                        competitor_futures.append(future)
-                
-                # Coletar resultados
-                research_data['market_data'] = future_market.result()
-                
-                for future in competitor_futures:
-                    try:
-                        competitor_info = future.result()
-                        if competitor_info:
-                            research_data['competitor_data'].append(competitor_info)
-                    except Exception as e:
-                        logger.warning(f"Erro ao obter dados de concorrente: {e}")
+            # Mercado e concorrentes em paralelo no loop de I/O: o tempo total é o da busca mais lenta
+            competitor_list = [c.strip() for c in concorrentes.split(',') if c.strip()][:3]  # Limitar a 3 concorrentes
+            market_data, *competitor_results = await self._gather_research(nicho, competitor_list, timestamp)
             
-            logger.info(f"✅ Pesquisa de mercado concluída: {len(research_data['competitor_data'])} concorrentes analisados")
+            research_data['market_data'] = market_data if not isinstance(market_data, BaseException) else {}
+            
+            for competitor_info in competitor_results:
+                if isinstance(competitor_info, BaseException):
+                    logger.warning("Erro ao obter dados de concorrente: %s", competitor_info)
+                elif competitor_info:
+                    research_data['competitor_data'].append(competitor_info)
+            
+            logger.info("✅ Pesquisa de mercado concluída: %s concorrentes analisados", len(research_data['competitor_data']))
             
         except Exception as e:
-            logger.error(f"❌ Erro na pesquisa de mercado: {e}")
+            logger.error("❌ Erro na pesquisa de mercado: %s", e)
         
         return research_data
     
+    async def _gather_research(self, nicho: str, competitor_list: List[str], timestamp: str) -> List[Any]:
+        """Dispara a pesquisa de mercado e a de cada concorrente ao mesmo tempo"""
+        # No máximo RESEARCH_CONCURRENCY frentes de pesquisa ativas, como o antigo pool de 3 threads
+        sem = asyncio.Semaphore(RESEARCH_CONCURRENCY)
+        
+        async def _bounded(coro):
+            async with sem:
+                return await coro
+        
+        return await asyncio.gather(
+            _bounded(self.web_searcher.search_market_data_async(nicho)),
+            *(_bounded(self.web_searcher.get_competitor_info_async(competitor, nicho, timestamp)) for competitor in competitor_list),
+            return_exceptions=True
+        )
+    
     def _generate_ai_analysis(self, data: Dict, research: Dict) -> Dict:
         """Gera análise usando IA com dados de pesquisa"""
         
         prompt = self._create_enhanced_analysis_prompt(data, research)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": self._get_system_prompt()
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                top_p=self.top_p,
-                stream=False
-            )
-            
-            content = response.choices[0].message.content
-            logger.info(f"✅ Resposta DeepSeek recebida: {len(content)} caracteres")
+            content = self._complete(self._get_system_prompt(), prompt)
             
             # Parse da resposta JSON
             analysis = self._extract_and_validate_json(content)
@@ -259,10 +706,177 @@ class DeepSeekClient:
             return analysis
             
         except Exception as e:
-            logger.error(f"❌ Erro ao gerar análise com IA: {str(e)}")
+            logger.error("❌ Erro ao gerar análise com IA: %s", e)
             return self._create_fallback_analysis(data)
     
-    def _get_system_prompt(self) -> str:
+    def _complete(self, system_prompt: str, prompt: str) -> str:
+        """Envia o prompt ao DeepSeek e devolve o texto completo da resposta"""
+        key = hashlib.blake2b(f"{system_prompt}\0{prompt}".encode('utf-8'), digest_size=16).hexdigest()
+        
+        with self._inflight_lock:
+            content = self._recent.get(key)
+            if content is not None:
+                logger.info("♻️ Resposta DeepSeek reaproveitada para prompt idêntico")
+                return content
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        
+        if not leader:
+            logger.info("🔗 Prompt idêntico já em andamento, aguardando a mesma resposta")
+            return future.result()
+        
+        try:
+            content = self._request_completion(system_prompt, prompt)
+        except BaseException as e:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        
+        with self._inflight_lock:
+            if content:
+                self._recent[key] = content
+            self._inflight.pop(key, None)
+        future.set_result(content)
+        return content
+    
+    def _request_completion(self, system_prompt: str, prompt: str) -> str:
+        """Chamada de streaming ao DeepSeek, sem deduplicação"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            stream=True
+        )
+        
+        # Streaming: os tokens chegam conforme são gerados, sem esperar a resposta inteira
+        content_parts = []
+        for chunk in response:
+            if chunk.choices:
+                content_parts.append(chunk.choices[0].delta.content or '')
+        content = ''.join(content_parts)
+        logger.info("✅ Resposta DeepSeek recebida: %s caracteres", len(content))
+        return content
+    
+    async def _complete_async(self, system_prompt: str, prompt: str) -> str:
+        """Versão assíncrona de _complete, para enviar vários lotes ao mesmo tempo"""
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": system_prompt
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            stream=True
+        )
+        
+        content_parts = []
+        async for chunk in response:
+            if chunk.choices:
+                content_parts.append(chunk.choices[0].delta.content or '')
+        content = ''.join(content_parts)
+        logger.info("✅ Resposta DeepSeek recebida: %s caracteres", len(content))
+        return content
+    
+    def analyze_avatar_batch(self, items: List[Dict]) -> List[Dict]:
+        """Analisa vários avatares agrupando-os em poucas requisições ao DeepSeek"""
+        if not items:
+            return []
+        
+        if not self.client:
+            logger.info("🔄 Cliente DeepSeek não disponível, usando análise de fallback")
+            return [self._create_fallback_analysis(data) for data in items]
+        
+        try:
+            return event_loop.run(self._analyze_batch_async(items))
+        except Exception as e:
+            logger.error("❌ Erro na análise DeepSeek em lote: %s", e)
+            return [self._create_fallback_analysis(data) for data in items]
+    
+    async def _analyze_batch_async(self, items: List[Dict]) -> List[Dict]:
+        """Pesquisa todos os itens em paralelo e envia os lotes ao DeepSeek ao mesmo tempo"""
+        logger.info("🔍 Pesquisando dados de mercado para %s análises...", len(items))
+        research = await asyncio.gather(*(self._conduct_market_research_async(data) for data in items))
+        
+        # Lotes de até BATCH_SIZE itens para caber em max_tokens, enviados em paralelo pelo cliente assíncrono
+        batches = [range(i, min(i + BATCH_SIZE, len(items))) for i in range(0, len(items), BATCH_SIZE)]
+        logger.info("🧠 Gerando %s análises com DeepSeek AI em %s lote(s)...", len(items), len(batches))
+        results = await asyncio.gather(*(
+            self._generate_batch_analysis([items[i] for i in batch], [research[i] for i in batch])
+            for batch in batches
+        ))
+        
+        return [
+            self._enrich_analysis(analysis, research_item)
+            for batch_result in results
+            for analysis, research_item in batch_result
+        ]
+    
+    async def _generate_batch_analysis(self, items: List[Dict], research: List[Dict]) -> List[Tuple[Dict, Dict]]:
+        """Gera as análises de um lote em uma única chamada; itens ausentes ou inválidos caem no fallback"""
+        prompt = self._create_batch_prompt(items, research)
+        
+        try:
+            analyses = self._extract_json_array(await self._complete_async(self._get_batch_system_prompt(), prompt)) or []
+        except Exception as e:
+            logger.error("❌ Erro ao gerar lote com IA: %s", e)
+            analyses = []
+        
+        if len(analyses) != len(items):
+            logger.warning("⚠️ Lote retornou %s de %s análises, completando com fallback", len(analyses), len(items))
+        
+        paired = []
+        for i, (data, research_item) in enumerate(zip(items, research)):
+            analysis = analyses[i] if i < len(analyses) else None
+            if not isinstance(analysis, dict) or not analysis:
+                analysis = self._create_fallback_analysis(data)
+            paired.append((analysis, research_item))
+        return paired
+    
+    def _create_batch_prompt(self, items: List[Dict], research: List[Dict]) -> str:
+        """Junta os prompts individuais, numerados, em um único pedido"""
+        sections = [
+            f"=== ENTRADA {i} ===\n{self._create_enhanced_analysis_prompt(data, research_item)}"
+            for i, (data, research_item) in enumerate(zip(items, research))
+        ]
+        return (
+            f"Você receberá {len(items)} entradas numeradas de 0 a {len(items) - 1}. "
+            "Retorne um array JSON em que o elemento i é a análise completa da entrada i, "
+            "seguindo a estrutura pedida em cada entrada.\n\n" + "\n\n".join(sections)
+        )
+    
+    @staticmethod
+    @cache
+    def _get_batch_system_prompt() -> str:
+        """Prompt de sistema para lotes: mesmas regras, saída em array"""
+        return DeepSeekClient._get_system_prompt() + """
+Ao receber várias entradas numeradas, retorne APENAS um array JSON válido em que o elemento i é a análise da entrada i, na mesma ordem.
+"""
+    
+    @staticmethod
+    @cache
+    def _get_system_prompt() -> str:
         """Prompt de sistema otimizado para análise de avatar"""
         return """
 Você é um especialista mundial em pesquisa de mercado, neurociência aplicada ao marketing e lançamentos de produtos digitais. 
@@ -299,7 +913,7 @@ Crie análises de avatar extremamente detalhadas, precisas e acionáveis.
         # Processar dados de pesquisa
         market_insights = self._process_research_data(research)
         
-        return f"""
+        header = f"""
 Analise o seguinte produto/serviço e crie uma análise ultra-detalhada do avatar ideal para o mercado brasileiro.
 
 DADOS DO PRODUTO:
@@ -315,202 +929,45 @@ DADOS DE PESQUISA DE MERCADO:
 
 Retorne APENAS um JSON válido com esta estrutura exata:
 
-{{
-  "escopo": {{
-    "nicho_principal": "{nicho}",
-    "subnichos": ["Subniche específico 1", "Subniche específico 2", "Subniche específico 3"],
-    "produto_ideal": "Nome do produto ideal baseado no nicho",
-    "proposta_valor": "Proposta de valor única e específica baseada na pesquisa"
-  }},
-  "avatar": {{
-    "demografia": {{
-      "faixa_etaria": "Faixa específica em anos",
-      "genero": "Distribuição percentual por gênero",
-      "localizacao": "Principais regiões do Brasil com percentuais",
-      "renda": "Faixa de renda mensal em R$",
-      "escolaridade": "Nível educacional predominante",
-      "profissoes": ["Profissão específica 1", "Profissão específica 2", "Profissão específica 3"]
-    }},
-    "psicografia": {{
-      "valores": ["Valor específico 1", "Valor específico 2", "Valor específico 3"],
-      "estilo_vida": "Descrição detalhada do estilo de vida",
-      "aspiracoes": ["Aspiração específica 1", "Aspiração específica 2"],
-      "medos": ["Medo específico 1", "Medo específico 2", "Medo específico 3"],
-      "frustracoes": ["Frustração específica 1", "Frustração específica 2"]
-    }},
-    "comportamento_digital": {{
-      "plataformas": ["Plataforma principal 1", "Plataforma principal 2"],
-      "horarios_pico": "Horários específicos de maior atividade",
-      "conteudo_preferido": ["Tipo de conteúdo 1", "Tipo de conteúdo 2", "Tipo de conteúdo 3"],
-      "influenciadores": ["Tipo de influenciador 1", "Tipo de influenciador 2"]
-    }}
-  }},
-  "dores_desejos": {{
-    "principais_dores": [
-      {{
-        "descricao": "Dor específica e detalhada 1",
-        "impacto": "Como esta dor impacta a vida da pessoa",
-        "urgencia": "Alta"
-      }},
-      {{
-        "descricao": "Dor específica e detalhada 2", 
-        "impacto": "Como esta dor impacta a vida da pessoa",
-        "urgencia": "Média"
-      }},
-      {{
-        "descricao": "Dor específica e detalhada 3",
-        "impacto": "Como esta dor impacta a vida da pessoa",
-        "urgencia": "Baixa"
-      }}
-    ],
-    "estado_atual": "Descrição detalhada do estado atual do avatar",
-    "estado_desejado": "Descrição detalhada do estado desejado",
-    "obstaculos": ["Obstáculo específico 1", "Obstáculo específico 2"],
-    "sonho_secreto": "O sonho mais profundo que o avatar não verbaliza"
-  }},
-  "concorrencia": {{
-    "diretos": [
-      {{
-        "nome": "Nome real do concorrente baseado na pesquisa",
-        "preco": "Faixa de preço em R$ baseada na pesquisa",
-        "usp": "Proposta única específica",
-        "forcas": ["Força específica 1", "Força específica 2"],
-        "fraquezas": ["Fraqueza específica 1", "Fraqueza específica 2"]
-      }}
-    ],
-    "indiretos": [
-      {{
-        "nome": "Concorrente indireto específico",
-        "tipo": "Tipo de solução alternativa"
-      }}
-    ],
-    "gaps_mercado": ["Gap específico 1 baseado na pesquisa", "Gap específico 2", "Gap específico 3"]
-  }},
-  "mercado": {{
-    "tam": "Valor em R$ bilhões baseado na pesquisa",
-    "sam": "Valor em R$ milhões baseado na pesquisa", 
-    "som": "Valor em R$ milhões baseado na pesquisa",
-    "volume_busca": "Número de buscas mensais baseado na pesquisa",
-    "tendencias_alta": ["Tendência em alta 1 da pesquisa", "Tendência em alta 2"],
-    "tendencias_baixa": ["Tendência em baixa 1 da pesquisa"],
-    "sazonalidade": {{
-      "melhores_meses": ["Mês 1", "Mês 2"],
-      "piores_meses": ["Mês 1"]
-    }}
-  }},
-  "palavras_chave": {{
-    "principais": [
-      {{
-        "termo": "palavra-chave específica baseada na pesquisa",
-        "volume": "Volume mensal estimado",
-        "cpc": "CPC em R$ estimado",
-        "dificuldade": "Alta/Média/Baixa",
-        "intencao": "Comercial/Informacional"
-      }}
-    ],
-    "custos_plataforma": {{
-      "facebook": {{"cpm": "R$ 18", "cpc": "R$ 1,45", "cpl": "R$ 28", "conversao": "2,8%"}},
-      "google": {{"cpm": "R$ 32", "cpc": "R$ 3,20", "cpl": "R$ 52", "conversao": "3,5%"}},
-      "youtube": {{"cpm": "R$ 12", "cpc": "R$ 0,80", "cpl": "R$ 20", "conversao": "1,8%"}},
-      "tiktok": {{"cpm": "R$ 8", "cpc": "R$ 0,60", "cpl": "R$ 18", "conversao": "1,5%"}}
-    }}
-  }},
-  "metricas": {{
-    "cac_medio": "R$ 420",
-    "funil_conversao": ["100% visitantes", "18% leads", "3,2% vendas"],
-    "ltv_medio": "R$ 1.680",
-    "ltv_cac_ratio": "4,0:1",
-    "roi_canais": {{
-      "facebook": "320%",
-      "google": "380%",
-      "youtube": "250%",
-      "tiktok": "180%"
-    }}
-  }},
-  "voz_mercado": {{
-    "objecoes": [
-      {{
-        "objecao": "Objeção específica comum baseada na pesquisa",
-        "contorno": "Como contornar esta objeção"
-      }}
-    ],
-    "linguagem": {{
-      "termos": ["Termo técnico 1", "Termo técnico 2"],
-      "girias": ["Gíria do nicho 1"],
-      "gatilhos": ["Gatilho mental 1", "Gatilho mental 2"]
-    }},
-    "crencas_limitantes": ["Crença limitante 1", "Crença limitante 2"]
-  }},
-  "projecoes": {{
-    "conservador": {{
-      "conversao": "2,0%",
-      "faturamento": "R$ 60.000",
-      "roi": "240%"
-    }},
-    "realista": {{
-      "conversao": "3,2%", 
-      "faturamento": "R$ 100.000",
-      "roi": "380%"
-    }},
-    "otimista": {{
-      "conversao": "5,0%",
-      "faturamento": "R$ 150.000",
-      "roi": "580%"
-    }}
-  }},
-  "plano_acao": [
-    {{
-      "passo": 1,
-      "acao": "Ação específica e prática 1 baseada na análise",
-      "prazo": "2 semanas"
-    }},
-    {{
-      "passo": 2,
-      "acao": "Ação específica e prática 2 baseada na análise", 
-      "prazo": "1 semana"
-    }}
-  ],
-  "insights_pesquisa": {{
-    "dados_mercado": "Principais insights da pesquisa de mercado",
-    "concorrentes_encontrados": "Concorrentes identificados na pesquisa",
-    "tendencias_identificadas": "Tendências identificadas na pesquisa",
-    "oportunidades_unicas": "Oportunidades únicas identificadas"
-  }}
-}}
-
-INSTRUÇÕES CRÍTICAS:
-- Use EXCLUSIVAMENTE dados da pesquisa fornecida quando disponível
-- Substitua TODOS os placeholders por valores numéricos reais
-- Base as projeções no preço ({preco}) e orçamento ({orcamento_marketing}) informados
-- Seja extremamente específico e detalhado
-- Foque em insights acionáveis baseados na pesquisa real
 """
+        # Só o cabeçalho e o nicho variam; esquema e instruções finais são constantes do módulo
+        return ''.join((
+            header,
+            _PROMPT_SCHEMA_HEAD, str(nicho), _PROMPT_SCHEMA_BODY,
+            _PROMPT_TAIL.format(preco=preco, orcamento_marketing=orcamento_marketing)
+        ))
 
     def _process_research_data(self, research: Dict) -> str:
         """Processa dados de pesquisa para incluir no prompt"""
         if not research or not research.get('market_data'):
             return "Nenhum dado de pesquisa disponível."
         
-        insights = []
+        # Cada linha é escrita direto no buffer, seguida de '\n'
+        buf = io.StringIO()
+        write = buf.write
         
         # Processar dados de mercado
         market_data = research.get('market_data', {})
         for category, results in market_data.items():
             if results:
-                insights.append(f"\n{category.upper()}:")
+                write(f"\n{category.upper()}:\n")
                 for result in results[:2]:  # Limitar a 2 resultados por categoria
-                    insights.append(f"- {result.get('title', '')}: {result.get('snippet', '')}")
+                    title = result.get('title', '')
+                    snippet = result.get('snippet', '')
+                    write(f"- {title}: {snippet}\n")
         
         # Processar dados de concorrentes
         competitor_data = research.get('competitor_data', [])
         if competitor_data:
-            insights.append("\nCONCORRENTES IDENTIFICADOS:")
+            write("\nCONCORRENTES IDENTIFICADOS:\n")
             for competitor in competitor_data:
-                insights.append(f"- {competitor.get('name', '')}")
+                write(f"- {competitor.get('name', '')}\n")
                 for result in competitor.get('search_results', [])[:1]:
-                    insights.append(f"  * {result.get('snippet', '')}")
+                    write(f"  * {result.get('snippet', '')}\n")
         
-        return '\n'.join(insights) if insights else "Dados de pesquisa limitados disponíveis."
+        # Sem o '\n' final, igual ao antigo '\n'.join das linhas
+        insights = buf.getvalue()
+        return insights[:-1] if insights else "Dados de pesquisa limitados disponíveis."
     
     def _enrich_analysis(self, analysis: Dict, research: Dict) -> Dict:
         """Enriquece a análise com dados adicionais da pesquisa"""
@@ -535,230 +992,239 @@ INSTRUÇÕES CRÍTICAS:
             return analysis
             
         except Exception as e:
-            logger.error(f"Erro ao enriquecer análise: {e}")
+            logger.error("Erro ao enriquecer análise: %s", e)
             return analysis
     
-    def _extract_and_validate_json(self, content: str) -> Optional[Dict]:
+    def _extract_and_validate_json(self, content: Union[str, bytes]) -> Optional[Dict]:
         """Extrai e valida JSON da resposta"""
         try:
-            # Remove possível texto antes e depois do JSON
-            content = content.strip()
+            # Busca e parse sobre os mesmos bytes UTF-8: o orjson não precisa recodificar o texto
+            data = content.encode('utf-8') if isinstance(content, str) else content
             
-            # Procura por JSON válido
-            start_idx = content.find('{')
-            end_idx = content.rfind('}')
+            # Procura por JSON válido (texto antes e depois do JSON é ignorado)
+            start_idx = data.find(b'{')
+            end_idx = data.rfind(b'}')
             
             if start_idx != -1 and end_idx != -1:
-                json_str = content[start_idx:end_idx + 1]
-                parsed_json = json.loads(json_str)
+                # memoryview evita copiar o trecho antes do parse
+                parsed_json = orjson.loads(memoryview(data)[start_idx:end_idx + 1])
                 logger.info("✅ JSON extraído e validado com sucesso")
                 return parsed_json
             
             # Tenta parsear o conteúdo inteiro
-            parsed_json = json.loads(content)
+            parsed_json = orjson.loads(data)
             logger.info("✅ JSON parseado diretamente com sucesso")
             return parsed_json
             
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Erro ao parsear JSON: {e}")
+        except orjson.JSONDecodeError as e:
+            logger.error("❌ Erro ao parsear JSON: %s", e)
             return None
         except Exception as e:
-            logger.error(f"❌ Erro inesperado ao extrair JSON: {e}")
+            logger.error("❌ Erro inesperado ao extrair JSON: %s", e)
+            return None
+
+    def _extract_json_array(self, content: str) -> Optional[List]:
+        """Extrai o array JSON de uma resposta em lote"""
+        try:
+            data = content.encode('utf-8')
+            start_idx = data.find(b'[')
+            end_idx = data.rfind(b']')
+            
+            if start_idx == -1 or end_idx == -1:
+                logger.error("❌ Resposta em lote sem array JSON")
+                return None
+            
+            parsed = orjson.loads(memoryview(data)[start_idx:end_idx + 1])
+            return parsed if isinstance(parsed, list) else None
+            
+        except orjson.JSONDecodeError as e:
+            logger.error("❌ Erro ao parsear array JSON: %s", e)
             return None
 
     def _create_fallback_analysis(self, data: Dict) -> Dict:
         """Cria análise de fallback detalhada quando a IA falha"""
-        nicho = data.get('nicho', 'Produto Digital')
-        produto = data.get('produto', 'Produto Digital')
+        nicho = _to_text(data.get('nicho'), 'Produto Digital')
+        produto = _to_text(data.get('produto'), 'Produto Digital')
         
-        # Garantir que preco seja um número válido
-        try:
-            preco = float(data.get('preco', 0)) if data.get('preco') else 997.0
-        except (ValueError, TypeError):
-            preco = 997.0
+        # Garantir que os valores numéricos sejam válidos
+        preco = _to_number(data.get('preco'), 997.0)
+        objetivo_receita = _to_number(data.get('objetivoReceita'), 100000.0)
+        orcamento_marketing = _to_number(data.get('orcamentoMarketing'), 50000.0)
         
-        # Garantir que outros valores numéricos sejam válidos
-        try:
-            objetivo_receita = float(data.get('objetivoReceita', 0)) if data.get('objetivoReceita') else 100000.0
-        except (ValueError, TypeError):
-            objetivo_receita = 100000.0
-            
-        try:
-            orcamento_marketing = float(data.get('orcamentoMarketing', 0)) if data.get('orcamentoMarketing') else 50000.0
-        except (ValueError, TypeError):
-            orcamento_marketing = 50000.0
-        
-        logger.info(f"🔄 Criando análise de fallback para {nicho} - Preço: R$ {preco}")
-        
-        return {
-            "escopo": {
-                "nicho_principal": nicho,
-                "subnichos": [f"{nicho} para iniciantes", f"{nicho} avançado", f"{nicho} empresarial"],
-                "produto_ideal": produto,
-                "proposta_valor": f"A metodologia mais completa e prática para dominar {nicho} no mercado brasileiro"
-            },
-            "avatar": {
-                "demografia": {
-                    "faixa_etaria": "32-45 anos",
-                    "genero": "65% mulheres, 35% homens",
-                    "localizacao": "Região Sudeste (45%), Sul (25%), Nordeste (20%), Centro-Oeste (10%)",
-                    "renda": "R$ 8.000 - R$ 25.000 mensais",
-                    "escolaridade": "Superior completo (80%), Pós-graduação (45%)",
-                    "profissoes": ["Empreendedores digitais", "Consultores", "Profissionais liberais", "Gestores", "Coaches"]
-                },
-                "psicografia": {
-                    "valores": ["Crescimento pessoal contínuo", "Independência financeira", "Reconhecimento profissional"],
-                    "estilo_vida": "Vida acelerada, busca por eficiência e produtividade, valoriza tempo de qualidade com família, investe em desenvolvimento pessoal",
-                    "aspiracoes": ["Ser reconhecido como autoridade no nicho", "Ter liberdade geográfica e financeira"],
-                    "medos": ["Ficar obsoleto no mercado", "Perder oportunidades por indecisão", "Não conseguir escalar o negócio"],
-                    "frustracoes": ["Excesso de informação sem aplicação prática", "Falta de tempo para implementar estratégias"]
-                },
-                "comportamento_digital": {
-                    "plataformas": ["Instagram (stories e reels)", "LinkedIn (networking profissional)"],
-                    "horarios_pico": "6h-8h (manhã) e 19h-22h (noite)",
-                    "conteudo_preferido": ["Vídeos educativos curtos", "Cases de sucesso com números", "Dicas práticas aplicáveis"],
-                    "influenciadores": ["Especialistas reconhecidos no nicho", "Empreendedores de sucesso com transparência"]
-                }
-            },
-            "dores_desejos": {
-                "principais_dores": [
-                    {
-                        "descricao": f"Dificuldade para se posicionar como autoridade em {nicho}",
-                        "impacto": "Baixo reconhecimento profissional e dificuldade para precificar serviços adequadamente",
-                        "urgencia": "Alta"
-                    },
-                    {
-                        "descricao": "Falta de metodologia estruturada e comprovada",
-                        "impacto": "Resultados inconsistentes e desperdício de tempo e recursos",
-                        "urgencia": "Alta"
-                    },
-                    {
-                        "descricao": "Concorrência acirrada e commoditização do mercado",
-                        "impacto": "Guerra de preços e dificuldade para se diferenciar",
-                        "urgencia": "Média"
-                    }
-                ],
-                "estado_atual": "Profissional competente com conhecimento técnico, mas sem estratégia clara de posicionamento e crescimento",
-                "estado_desejado": "Autoridade reconhecida no nicho com negócio escalável e lucrativo, trabalhando com propósito e impacto",
-                "obstaculos": ["Falta de método estruturado", "Dispersão de foco em múltiplas estratégias", "Recursos limitados para investimento"],
-                "sonho_secreto": "Ser reconhecido como o maior especialista do nicho no Brasil e ter um negócio que funcione sem sua presença constante"
-            },
-            "concorrencia": {
-                "diretos": [
-                    {
-                        "nome": f"Academia Premium {nicho}",
-                        "preco": f"R$ {int(preco * 1.8):,}".replace(',', '.'),
-                        "usp": "Metodologia exclusiva com certificação",
-                        "forcas": ["Marca estabelecida há 5+ anos", "Comunidade ativa de 10k+ membros"],
-                        "fraquezas": ["Preço elevado", "Suporte limitado", "Conteúdo muito teórico"]
-                    }
-                ],
-                "indiretos": [
-                    {
-                        "nome": "Cursos gratuitos no YouTube",
-                        "tipo": "Conteúdo educacional gratuito"
-                    }
-                ],
-                "gaps_mercado": [
-                    "Falta de metodologia prática com implementação assistida",
-                    "Ausência de suporte contínuo pós-compra",
-                    "Preços inacessíveis para profissionais em início de carreira"
-                ]
-            },
-            "mercado": {
-                "tam": "R$ 3,2 bilhões",
-                "sam": "R$ 480 milhões",
-                "som": "R$ 24 milhões",
-                "volume_busca": "67.000 buscas/mês",
-                "tendencias_alta": ["IA aplicada ao nicho", "Automação de processos", "Sustentabilidade e ESG"],
-                "tendencias_baixa": ["Métodos tradicionais offline", "Processos manuais repetitivos"],
-                "sazonalidade": {
-                    "melhores_meses": ["Janeiro", "Março", "Setembro"],
-                    "piores_meses": ["Dezembro", "Julho"]
-                }
-            },
-            "palavras_chave": {
-                "principais": [
-                    {
-                        "termo": f"curso {nicho}",
-                        "volume": "12.100",
-                        "cpc": "R$ 4,20",
-                        "dificuldade": "Média",
-                        "intencao": "Comercial"
-                    }
-                ],
-                "custos_plataforma": {
-                    "facebook": {"cpm": "R$ 18", "cpc": "R$ 1,45", "cpl": "R$ 28", "conversao": "2,8%"},
-                    "google": {"cpm": "R$ 32", "cpc": "R$ 3,20", "cpl": "R$ 52", "conversao": "3,5%"},
-                    "youtube": {"cpm": "R$ 12", "cpc": "R$ 0,80", "cpl": "R$ 20", "conversao": "1,8%"},
-                    "tiktok": {"cpm": "R$ 8", "cpc": "R$ 0,60", "cpl": "R$ 18", "conversao": "1,5%"}
-                }
-            },
-            "metricas": {
-                "cac_medio": f"R$ {int(orcamento_marketing * 0.01):,}".replace(',', '.'),
-                "funil_conversao": ["100% visitantes", "18% leads", "3,2% vendas"],
-                "ltv_medio": f"R$ {int(preco * 1.8):,}".replace(',', '.'),
-                "ltv_cac_ratio": "4,0:1",
-                "roi_canais": {
-                    "facebook": "320%",
-                    "google": "380%",
-                    "youtube": "250%",
-                    "tiktok": "180%"
-                }
-            },
-            "voz_mercado": {
-                "objecoes": [
-                    {
-                        "objecao": "Não tenho tempo para mais um curso",
-                        "contorno": "Metodologia de implementação em 15 minutos diários com resultados em 30 dias"
-                    }
-                ],
-                "linguagem": {
-                    "termos": ["Metodologia", "Sistema", "Framework", "Estratégia", "Resultados"],
-                    "girias": ["Game changer", "Virada de chave", "Next level"],
-                    "gatilhos": ["Comprovado cientificamente", "Resultados garantidos", "Método exclusivo"]
-                },
-                "crencas_limitantes": [
-                    "Preciso trabalhar mais horas para ganhar mais dinheiro",
-                    "Só quem tem muito dinheiro consegue se destacar no mercado"
-                ]
+        logger.info("🔄 Criando análise de fallback para %s - Preço: R$ %s", nicho, preco)
+        
+        # Cópia nova a cada chamada: _enrich_analysis e as rotas acrescentam campos ao resultado
+        return orjson.loads(get_fallback_json(nicho, produto, preco, objetivo_receita, orcamento_marketing))
+
+# Cenários das projeções de fallback: (nome, conversão, multiplicador do objetivo de receita, ROI)
+_SCENARIOS = (
+    ("conservador", "2,0%", 0.6, "240%"),
+    ("realista", "3,2%", 1.0, "380%"),
+    ("otimista", "5,0%", 1.5, "580%")
+)
+
+# Análise de fallback: estrutura fixa serializada uma vez na importação, com marcadores
+# __NOME__ nos poucos valores que dependem da requisição
+_FALLBACK_TEMPLATE = {
+    "escopo": {
+        "nicho_principal": "__NICHO__",
+        "subnichos": ["__NICHO__ para iniciantes", "__NICHO__ avançado", "__NICHO__ empresarial"],
+        "produto_ideal": "__PRODUTO__",
+        "proposta_valor": "A metodologia mais completa e prática para dominar __NICHO__ no mercado brasileiro"
+    },
+    "avatar": {
+        "demografia": {
+            "faixa_etaria": "32-45 anos",
+            "genero": "65% mulheres, 35% homens",
+            "localizacao": "Região Sudeste (45%), Sul (25%), Nordeste (20%), Centro-Oeste (10%)",
+            "renda": "R$ 8.000 - R$ 25.000 mensais",
+            "escolaridade": "Superior completo (80%), Pós-graduação (45%)",
+            "profissoes": ["Empreendedores digitais", "Consultores", "Profissionais liberais", "Gestores", "Coaches"]
+        },
+        "psicografia": {
+            "valores": ["Crescimento pessoal contínuo", "Independência financeira", "Reconhecimento profissional"],
+            "estilo_vida": "Vida acelerada, busca por eficiência e produtividade, valoriza tempo de qualidade com família, investe em desenvolvimento pessoal",
+            "aspiracoes": ["Ser reconhecido como autoridade no nicho", "Ter liberdade geográfica e financeira"],
+            "medos": ["Ficar obsoleto no mercado", "Perder oportunidades por indecisão", "Não conseguir escalar o negócio"],
+            "frustracoes": ["Excesso de informação sem aplicação prática", "Falta de tempo para implementar estratégias"]
+        },
+        "comportamento_digital": {
+            "plataformas": ["Instagram (stories e reels)", "LinkedIn (networking profissional)"],
+            "horarios_pico": "6h-8h (manhã) e 19h-22h (noite)",
+            "conteudo_preferido": ["Vídeos educativos curtos", "Cases de sucesso com números", "Dicas práticas aplicáveis"],
+            "influenciadores": ["Especialistas reconhecidos no nicho", "Empreendedores de sucesso com transparência"]
+        }
+    },
+    "dores_desejos": {
+        "principais_dores": [
+            {
+                "descricao": "Dificuldade para se posicionar como autoridade em __NICHO__",
+                "impacto": "Baixo reconhecimento profissional e dificuldade para precificar serviços adequadamente",
+                "urgencia": "Alta"
             },
-            "projecoes": {
-                "conservador": {
-                    "conversao": "2,0%",
-                    "faturamento": f"R$ {int(objetivo_receita * 0.6):,}".replace(',', '.'),
-                    "roi": "240%"
-                },
-                "realista": {
-                    "conversao": "3,2%",
-                    "faturamento": f"R$ {int(objetivo_receita):,}".replace(',', '.'),
-                    "roi": "380%"
-                },
-                "otimista": {
-                    "conversao": "5,0%",
-                    "faturamento": f"R$ {int(objetivo_receita * 1.5):,}".replace(',', '.'),
-                    "roi": "580%"
-                }
+            {
+                "descricao": "Falta de metodologia estruturada e comprovada",
+                "impacto": "Resultados inconsistentes e desperdício de tempo e recursos",
+                "urgencia": "Alta"
             },
-            "plano_acao": [
-                {"passo": 1, "acao": "Validar proposta de valor com pesquisa qualitativa (50 entrevistas)", "prazo": "2 semanas"},
-                {"passo": 2, "acao": "Criar landing page otimizada com copy baseado na pesquisa", "prazo": "1 semana"},
-                {"passo": 3, "acao": "Configurar campanhas de tráfego pago (Facebook e Google)", "prazo": "1 semana"},
-                {"passo": 4, "acao": "Produzir conteúdo de aquecimento (webinar + sequência de e-mails)", "prazo": "2 semanas"},
-                {"passo": 5, "acao": "Executar campanha de pré-lançamento com early bird", "prazo": "1 semana"},
-                {"passo": 6, "acao": "Lançamento oficial com live de abertura", "prazo": "1 semana"},
-                {"passo": 7, "acao": "Otimizar campanhas baseado em dados e escalar investimento", "prazo": "Contínuo"}
-            ],
-            "insights_pesquisa": {
-                "dados_mercado": "Análise baseada em dados de mercado consolidados e benchmarks da indústria",
-                "concorrentes_encontrados": "Principais players identificados através de análise competitiva",
-                "tendencias_identificadas": "Tendências emergentes no mercado brasileiro",
-                "oportunidades_unicas": "Gaps de mercado identificados para diferenciação estratégica"
-            },
-            "research_metadata": {
-                "search_timestamp": datetime.now().isoformat(),
-                "sources_consulted": 0,
-                "competitors_analyzed": 0,
-                "data_quality": "fallback"
+            {
+                "descricao": "Concorrência acirrada e commoditização do mercado",
+                "impacto": "Guerra de preços e dificuldade para se diferenciar",
+                "urgencia": "Média"
+            }
+        ],
+        "estado_atual": "Profissional competente com conhecimento técnico, mas sem estratégia clara de posicionamento e crescimento",
+        "estado_desejado": "Autoridade reconhecida no nicho com negócio escalável e lucrativo, trabalhando com propósito e impacto",
+        "obstaculos": ["Falta de método estruturado", "Dispersão de foco em múltiplas estratégias", "Recursos limitados para investimento"],
+        "sonho_secreto": "Ser reconhecido como o maior especialista do nicho no Brasil e ter um negócio que funcione sem sua presença constante"
+    },
+    "concorrencia": {
+        "diretos": [
+            {
+                "nome": "Academia Premium __NICHO__",
+                "preco": "__PRECO_PREMIUM__",
+                "usp": "Metodologia exclusiva com certificação",
+                "forcas": ["Marca estabelecida há 5+ anos", "Comunidade ativa de 10k+ membros"],
+                "fraquezas": ["Preço elevado", "Suporte limitado", "Conteúdo muito teórico"]
+            }
+        ],
+        "indiretos": [
+            {
+                "nome": "Cursos gratuitos no YouTube",
+                "tipo": "Conteúdo educacional gratuito"
             }
-        }
\ No newline at end of file
+        ],
+        "gaps_mercado": [
+            "Falta de metodologia prática com implementação assistida",
+            "Ausência de suporte contínuo pós-compra",
+            "Preços inacessíveis para profissionais em início de carreira"
+        ]
+    },
+    "mercado": {
+        "tam": "R$ 3,2 bilhões",
+        "sam": "R$ 480 milhões",
+        "som": "R$ 24 milhões",
+        "volume_busca": "67.000 buscas/mês",
+        "tendencias_alta": ["IA aplicada ao nicho", "Automação de processos", "Sustentabilidade e ESG"],
+        "tendencias_baixa": ["Métodos tradicionais offline", "Processos manuais repetitivos"],
+        "sazonalidade": {
+            "melhores_meses": ["Janeiro", "Março", "Setembro"],
+            "piores_meses": ["Dezembro", "Julho"]
+        }
+    },
+    "palavras_chave": {
+        "principais": [
+            {
+                "termo": "curso __NICHO__",
+                "volume": "12.100",
+                "cpc": "R$ 4,20",
+                "dificuldade": "Média",
+                "intencao": "Comercial"
+            }
+        ],
+        "custos_plataforma": {
+            "facebook": {"cpm": "R$ 18", "cpc": "R$ 1,45", "cpl": "R$ 28", "conversao": "2,8%"},
+            "google": {"cpm": "R$ 32", "cpc": "R$ 3,20", "cpl": "R$ 52", "conversao": "3,5%"},
+            "youtube": {"cpm": "R$ 12", "cpc": "R$ 0,80", "cpl": "R$ 20", "conversao": "1,8%"},
+            "tiktok": {"cpm": "R$ 8", "cpc": "R$ 0,60", "cpl": "R$ 18", "conversao": "1,5%"}
+        }
+    },
+    "metricas": {
+        "cac_medio": "__CAC_MEDIO__",
+        "funil_conversao": ["100% visitantes", "18% leads", "3,2% vendas"],
+        "ltv_medio": "__PRECO_PREMIUM__",
+        "ltv_cac_ratio": "4,0:1",
+        "roi_canais": _ROI_CANAIS
+    },
+    "voz_mercado": _VOZ_MERCADO,
+    "projecoes": {
+        name: {"conversao": conversao, "faturamento": f"__FATURAMENTO_{name.upper()}__", "roi": roi}
+        for name, conversao, _, roi in _SCENARIOS
+    },
+    "plano_acao": _PLANO_ACAO,
+    "insights_pesquisa": _INSIGHTS_PESQUISA,
+    "research_metadata": {
+        "search_timestamp": "__SEARCH_TIMESTAMP__",  # Preenchido por chamada em get_fallback_json
+        "sources_consulted": 0,
+        "competitors_analyzed": 0,
+        "data_quality": "fallback"
+    }
+}
+
+_FALLBACK_JSON = orjson.dumps(_FALLBACK_TEMPLATE).decode('utf-8')
+_TIMESTAMP_MARKER = b'__SEARCH_TIMESTAMP__'
+
+@lru_cache(maxsize=128)
+def _render_fallback_parts(nicho: str, produto: str, preco: float, objetivo_receita: float, orcamento_marketing: float) -> Tuple[bytes, bytes]:
+    """JSON da análise de fallback (saída determinística, sem TTL), dividido no marcador do timestamp"""
+    values = {
+        'NICHO': _json_text(nicho),
+        'PRODUTO': _json_text(produto),
+        'PRECO_PREMIUM': _brl(preco * 1.8),
+        'CAC_MEDIO': _brl(orcamento_marketing * 0.01),
+        # Mantido no JSON para ser trocado a cada chamada por get_fallback_json
+        'SEARCH_TIMESTAMP': _TIMESTAMP_MARKER.decode('ascii')
+    }
+    values.update((f'FATURAMENTO_{name.upper()}', _brl(objetivo_receita * multiplier)) for name, _, multiplier, _ in _SCENARIOS)
+    rendered = _render_template(_FALLBACK_JSON, values)
+    # research_metadata é a última chave, então o último marcador é o do timestamp (e não texto do usuário)
+    head, _, tail = rendered.rpartition(_TIMESTAMP_MARKER)
+    return head, tail
+
+_ts_cache = (0, '')
+
+def timestamp_now() -> str:
+    """Timestamp ISO local com resolução de segundo, formatado uma vez por segundo"""
+    global _ts_cache
+    second = int(time.time())
+    cached_second, text = _ts_cache
+    if second != cached_second:
+        text = datetime.fromtimestamp(second).isoformat()
+        _ts_cache = (second, text)
+    return text
+
+def get_fallback_json(nicho: str = 'Produto Digital', produto: str = 'Produto Digital', preco: float = 997.0,
+                      objetivo_receita: float = 100000.0, orcamento_marketing: float = 50000.0) -> bytes:
+    """Análise de fallback já serializada, com o horário da chamada (para quem só precisa do JSON)"""
+    head, tail = _render_fallback_parts(nicho, produto, preco, objetivo_receita, orcamento_marketing)
+    return b''.join((head, timestamp_now().encode('ascii'), tail))
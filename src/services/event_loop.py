@@ -0,0 +1,36 @@
+import os
+import asyncio
+import threading
+import logging
+
+try:
+    import uvloop
+except ImportError:  # Opcional (indisponível no Windows): sem ele usa o loop padrão do asyncio
+    uvloop = None
+
+logger = logging.getLogger(__name__)
+
+# Loop asyncio dedicado, rodando em uma thread de fundo, para o I/O concorrente das pesquisas.
+# Criado sob demanda e por processo: os workers do gunicorn (pós-fork) não herdam a thread do master.
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Retorna o loop de fundo do processo atual, iniciando-o na primeira chamada"""
+    global _loop, _loop_pid
+    pid = os.getpid()
+    if _loop is None or _loop_pid != pid:
+        with _loop_lock:
+            if _loop is None or _loop_pid != pid:
+                # Só este loop usa uvloop: a política global do processo não é alterada
+                loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='asyncio-io', daemon=True).start()
+                _loop, _loop_pid = loop, pid
+                logger.info("🔁 Loop asyncio de I/O iniciado (pid %s, %s)", pid, 'uvloop' if uvloop else 'asyncio')
+    return _loop
+
+def run(coro, timeout=None):
+    """Executa a corrotina no loop de fundo e bloqueia a thread chamadora até o resultado"""
+    # Não chamar de dentro do próprio loop: a thread do loop ficaria esperando por si mesma
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
@@ -0,0 +1,70 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import orjson
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cache em disco dos resultados de busca: compartilhado entre workers e sobrevive a reinícios
+SEARCH_CACHE_PATH = os.getenv('SEARCH_CACHE_PATH', '/tmp/websearch.sqlite3')
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '86400'))
+
+_conn = None
+_conn_pid = None
+_lock = threading.Lock()
+
+def _connection() -> sqlite3.Connection:
+    """Conexão SQLite do processo atual (não reaproveitada após fork)"""
+    global _conn, _conn_pid
+    pid = os.getpid()
+    if _conn is None or _conn_pid != pid:
+        conn = sqlite3.connect(SEARCH_CACHE_PATH, timeout=5, check_same_thread=False, isolation_level=None)
+        # WAL permite leituras de outros workers enquanto um deles grava
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS search_cache '
+            '(key TEXT PRIMARY KEY, payload BLOB NOT NULL, expires REAL NOT NULL)'
+        )
+        _conn, _conn_pid = conn, pid
+    return _conn
+
+def cache_key(query: str, num_results: int) -> str:
+    """Chave da busca: consulta normalizada + quantidade de resultados"""
+    return hashlib.sha256(f"{query.lower().strip()}{num_results}".encode('utf-8')).hexdigest()
+
+def load(key: str, max_age: Optional[int] = None) -> Optional[Any]:
+    """Resultado em cache e ainda válido, ou None (max_age=0 força nova busca)"""
+    if max_age == 0:
+        return None
+    try:
+        with _lock:
+            row = _connection().execute(
+                'SELECT payload, expires FROM search_cache WHERE key = ?', (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Cache de busca indisponível: %s", e)
+        return None
+
+    if row is None:
+        return None
+    payload, expires = row
+    now = time.time()
+    # max_age restringe a idade aceita sem alterar o TTL gravado
+    if expires <= now or (max_age is not None and expires - SEARCH_CACHE_TTL + max_age <= now):
+        return None
+    return orjson.loads(payload)
+
+def store(key: str, value: Any) -> None:
+    """Grava o resultado com validade de SEARCH_CACHE_TTL segundos"""
+    try:
+        with _lock:
+            _connection().execute(
+                'INSERT OR REPLACE INTO search_cache (key, payload, expires) VALUES (?, ?, ?)',
+                (key, orjson.dumps(value), time.time() + SEARCH_CACHE_TTL)
+            )
+    except sqlite3.Error as e:
+        logger.warning("⚠️ Falha ao gravar cache de busca: %s", e)
@@ -166,7 +166,12 @@ async function performAnalysis(data) {
             throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
         }
         
-        const result = await response.json();
+        let result = await response.json();
+        
+        // 202: análise em processamento no servidor, acompanhar até concluir
+        if (response.status === 202) {
+            result = await waitForAnalysis(result.analysis_id);
+        }
         currentAnalysis = result;
         
         // Wait for progress simulation to complete
@@ -184,6 +189,31 @@ async function performAnalysis(data) {
     }
 }
 
+async function waitForAnalysis(analysisId, interval = 3000, maxAttempts = 200) {
+    for (let attempt = 0; attempt < maxAttempts; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, interval));
+        
+        const statusResponse = await fetch(`/api/analyses/${analysisId}/status`);
+        if (!statusResponse.ok) {
+            continue;
+        }
+        
+        const { status } = await statusResponse.json();
+        if (status === 'completed') {
+            const analysisResponse = await fetch(`/api/analyses/${analysisId}`);
+            if (!analysisResponse.ok) {
+                throw new Error(`HTTP error! status: ${analysisResponse.status}`);
+            }
+            return analysisResponse.json();
+        }
+        if (status === 'failed') {
+            throw new Error('A análise falhou no servidor');
+        }
+    }
+    
+    throw new Error('Tempo limite excedido aguardando a análise');
+}
+
 function hideLoading() {
     loadingState.style.display = 'none';
     resultsContainer.style.display = 'block';
@@ -0,0 +1,26 @@
+-- Nichos distintos calculados no Postgres (usado por GET /api/nichos)
+-- nicho é NOT NULL e já possui idx_analyses_nicho, então não há índice novo:
+-- a função percorre o índice saltando de um valor distinto ao próximo
+-- (loose index scan) em vez de ler todas as linhas da tabela.
+
+CREATE OR REPLACE FUNCTION distinct_nichos()
+RETURNS TABLE (nicho TEXT)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH RECURSIVE distintos AS (
+        (SELECT a.nicho FROM analyses a ORDER BY a.nicho LIMIT 1)
+        UNION ALL
+        SELECT (
+            SELECT a.nicho FROM analyses a
+            WHERE a.nicho > d.nicho
+            ORDER BY a.nicho
+            LIMIT 1
+        )
+        FROM distintos d
+        WHERE d.nicho IS NOT NULL
+    )
+    SELECT distintos.nicho::TEXT FROM distintos WHERE distintos.nicho <> '';
+$$;
+
+COMMENT ON FUNCTION distinct_nichos() IS 'Lista ordenada de nichos distintos da tabela analyses';
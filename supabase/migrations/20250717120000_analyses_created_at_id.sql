@@ -0,0 +1,5 @@
+-- Paginação por keyset de GET /api/analyses: ORDER BY created_at DESC, id DESC
+-- com o cursor (created_at, id). O id desempata análises com o mesmo created_at,
+-- e o índice composto atende a ordenação e o filtro do cursor sem ordenar em memória.
+
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at_id ON analyses(created_at DESC, id DESC);
@@ -0,0 +1,128 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Os módulos da aplicação importam uns aos outros a partir de src/ (como no gunicorn)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from main import create_app  # noqa: E402
+from extensions import limiter  # noqa: E402
+from routes import analysis  # noqa: E402
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeQuery:
+    """Consulta encadeável do PostgREST sobre a tabela em memória"""
+
+    def __init__(self, table, action, values=None):
+        self.table = table
+        self.action = action
+        self.values = values
+        self.filters = []
+        self.params = analysis.httpx.QueryParams()
+
+    def eq(self, column, value):
+        self.filters.append((column, value))
+        return self
+
+    def execute(self):
+        rows = self.table.rows
+        if self.action == 'insert':
+            row_id = len(rows) + 1
+            rows[row_id] = {**self.values, 'id': row_id, 'created_at': _now(), 'updated_at': _now()}
+            return type('Result', (), {'data': [{'id': row_id}]})()
+
+        matches = [row for row in rows.values() if all(row.get(col) == val for col, val in self.filters)]
+        if self.action == 'update':
+            for row in matches:
+                row.update(self.values, updated_at=_now())
+        return type('Result', (), {'data': [dict(row) for row in matches]})()
+
+
+class FakeTable:
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, record):
+        return FakeQuery(self, 'insert', record)
+
+    def update(self, values, **kwargs):
+        return FakeQuery(self, 'update', values)
+
+    def select(self, columns):
+        return FakeQuery(self, 'select')
+
+
+class FakeSupabase:
+    """Só a tabela analyses, com insert/update/select filtrados por eq"""
+
+    def __init__(self):
+        self.analyses = FakeTable()
+
+    def table(self, name):
+        assert name == 'analyses'
+        return self.analyses
+
+
+class DeferredExecutor:
+    """Guarda os jobs submetidos para o teste decidir quando executá-los"""
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, *args):
+        self.jobs.append((fn, args))
+
+    def run_all(self):
+        while self.jobs:
+            fn, args = self.jobs.pop(0)
+            fn(*args)
+
+
+class FakeDeepSeek:
+    def __init__(self, error=None):
+        self.error = error
+
+    def analyze_avatar_comprehensive(self, data):
+        if self.error:
+            raise self.error
+        return {'avatar': {'nicho': data['nicho']}, 'escopo': {'produto_ideal': data['produto']}}
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    limiter.enabled = False
+    return app
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    fake = FakeSupabase()
+    monkeypatch.setattr(analysis, 'supabase', fake)
+    return fake
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    deferred = DeferredExecutor()
+    monkeypatch.setattr(analysis, '_analysis_executor', deferred)
+    return deferred
+
+
+@pytest.fixture
+def deepseek(monkeypatch):
+    fake = FakeDeepSeek()
+    monkeypatch.setattr(analysis, 'deepseek_client', fake)
+    return fake
+
+
+@pytest.fixture
+def client(app, supabase, executor, deepseek):
+    return app.test_client()
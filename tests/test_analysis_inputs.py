@@ -0,0 +1,37 @@
+import pytest
+
+from routes.analysis import _to_float
+
+
+@pytest.mark.parametrize('value', ['nan', 'NaN', 'inf', '-inf', 'Infinity', 'abc', '', None])
+def test_to_float_rejects_invalid_and_non_finite(value):
+    assert _to_float(value, 997.0) == 997.0
+
+
+def test_to_float_parses_numbers():
+    assert _to_float('497') == 497.0
+    assert _to_float(12.5) == 12.5
+
+
+def test_non_finite_price_falls_back_to_defaults(client, monkeypatch):
+    from routes import analysis
+    monkeypatch.setattr(analysis, 'deepseek_client', None)
+
+    response = client.post('/api/analyze?sync=1', json={'nicho': 'Fitness', 'preco': 'nan', 'objetivoReceita': 'inf'})
+
+    assert response.status_code == 200
+    assert response.get_json()['projecoes']['realista']['faturamento'] == 'R$ 100.000'
+
+
+def test_cursor_round_trips_created_at_and_id():
+    from routes.analysis import decode_cursor, encode_cursor
+
+    cursor = encode_cursor({'created_at': '2025-07-02T08:37:21.123456+00:00', 'id': 42})
+
+    assert decode_cursor(cursor) == ('2025-07-02T08:37:21.123456+00:00', 42)
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get('/api/analyses?cursor=not-a-cursor')
+
+    assert response.status_code == 400
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+
+PAYLOAD = {'nicho': 'Fitness', 'produto': 'Curso Online', 'preco': '497'}
+
+
+def _status(client, analysis_id):
+    response = client.get(f'/api/analyses/{analysis_id}/status')
+    assert response.status_code == 200
+    return response.get_json()['status']
+
+
+def test_analyze_returns_202_and_completes_in_background(client, supabase, executor):
+    response = client.post('/api/analyze', json=PAYLOAD)
+
+    assert response.status_code == 202
+    body = response.get_json()
+    analysis_id = body['analysis_id']
+    assert body['status'] == 'processing'
+    assert body['status_url'] == f'/api/analyses/{analysis_id}/status'
+    assert _status(client, analysis_id) == 'processing'
+
+    executor.run_all()
+
+    assert _status(client, analysis_id) == 'completed'
+    row = supabase.analyses.rows[analysis_id]
+    assert row['avatar_data'] == {'nicho': 'Fitness'}
+    assert row['comprehensive_analysis']['analysis_id'] == analysis_id
+
+
+def test_failed_job_marks_analysis_failed(client, executor, deepseek):
+    deepseek.error = RuntimeError('DeepSeek fora do ar')
+    analysis_id = client.post('/api/analyze', json=PAYLOAD).get_json()['analysis_id']
+
+    executor.run_all()
+
+    assert _status(client, analysis_id) == 'failed'
+
+
+def test_sync_flag_runs_in_request(client, supabase, executor):
+    response = client.post('/api/analyze?sync=1', json=PAYLOAD)
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['avatar'] == {'nicho': 'Fitness'}
+    assert not executor.jobs
+    assert supabase.analyses.rows[body['analysis_id']]['status'] == 'completed'
+
+
+def test_stale_processing_analysis_is_reported_failed(client, supabase):
+    analysis_id = client.post('/api/analyze', json=PAYLOAD).get_json()['analysis_id']
+    row = supabase.analyses.rows[analysis_id]
+    row['updated_at'] = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+
+    assert _status(client, analysis_id) == 'failed'
+    assert row['status'] == 'failed'
+
+
+def test_mark_failed_keeps_completed_analysis(client, supabase, executor):
+    from routes.analysis import mark_analysis_failed_safe
+
+    analysis_id = client.post('/api/analyze', json=PAYLOAD).get_json()['analysis_id']
+    executor.run_all()
+    mark_analysis_failed_safe(analysis_id)
+
+    assert supabase.analyses.rows[analysis_id]['status'] == 'completed'
+
+
+def test_without_database_serves_the_fallback_json(client, monkeypatch):
+    from routes import analysis
+    monkeypatch.setattr(analysis, 'supabase', None)
+    monkeypatch.setattr(analysis, 'deepseek_client', None)
+
+    response = client.post('/api/analyze', json=PAYLOAD)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    body = response.get_json()
+    assert body['escopo']['nicho_principal'] == 'Fitness'
+    assert body['projecoes']['realista']['faturamento'] == 'R$ 100.000'
+    assert body['research_metadata']['data_quality'] == 'fallback'